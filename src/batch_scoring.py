@@ -0,0 +1,131 @@
+# Scorare în lot (fără interfață grafică) a fișierelor CSV/Parquet cu vectori de simptome brute
+import argparse
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.triage_common import MODEL_PATH, DIAGNOSES, INPUT_FEATURES
+from src.neural_network.prediction_cache import CachedPredictor, DEFAULT_MAXSIZE
+
+# Numărul implicit de rânduri citite/scorate odată (memoria rămâne constantă)
+DEFAULT_CHUNK_SIZE = 50_000
+
+PROBABILITY_COLUMNS = [f'P{class_code}' for class_code in sorted(DIAGNOSES)]
+# Doar pentru backend-ul 'ensemble': deviația standard între membri pe clasă și dezacordul top-1
+STD_COLUMNS = [f'STD{class_code}' for class_code in sorted(DIAGNOSES)]
+
+
+def is_parquet(path):
+    return path.lower().endswith(('.parquet', '.pq'))
+
+
+def iter_input_chunks(input_path, chunk_size, has_header=True):
+    """Citește fișierul de intrare în bucăți de `chunk_size` rânduri, returnând doar cele 12 atribute."""
+    if is_parquet(input_path):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            print("Eroare: citirea fișierelor Parquet necesită pachetul 'pyarrow' (pip install pyarrow).")
+            sys.exit(1)
+        parquet_file = pq.ParquetFile(input_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=INPUT_FEATURES):
+            yield batch.to_pandas()
+        return
+
+    # CSV: fie cu antet (A1..A10, A11, A34 + eventual alte coloane), fie primele 12 coloane în ordinea modelului
+    read_kwargs = dict(chunksize=chunk_size, na_values='?')
+    if has_header:
+        read_kwargs['usecols'] = INPUT_FEATURES
+    else:
+        read_kwargs.update(header=None, names=INPUT_FEATURES, usecols=range(len(INPUT_FEATURES)))
+    for chunk in pd.read_csv(input_path, **read_kwargs):
+        yield chunk[INPUT_FEATURES]
+
+
+class ResultWriter:
+    """Scrie rezultatele incremental (CSV sau Parquet), bucată cu bucată."""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.parquet_writer = None
+        self.first_chunk = True
+
+    def write(self, df):
+        if is_parquet(self.output_path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.parquet_writer is None:
+                self.parquet_writer = pq.ParquetWriter(self.output_path, table.schema)
+            self.parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.output_path, mode='w' if self.first_chunk else 'a',
+                      header=self.first_chunk, index=False, float_format='%.6f')
+        self.first_chunk = False
+
+    def close(self):
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+
+
+def score_chunk(predictor, raw_chunk):
+    """Scalează și scorează un bloc de rânduri brute; vectorii care nu sunt în cache trec printr-un singur forward pass."""
+    # Vârsta lipsă ('?' -> NaN) primește mediana salvată odată cu scalerul
+    raw_values = raw_chunk.to_numpy(dtype=np.float64)
+    probabilities, std, disagreement = predictor.predict_raw_with_uncertainty(raw_values)
+
+    predicted_class = probabilities.argmax(axis=1) + 1
+    result = pd.DataFrame(probabilities, columns=PROBABILITY_COLUMNS)
+    result.insert(0, 'predicted_class', predicted_class)
+    result.insert(1, 'diagnosis', pd.Series(predicted_class).map(DIAGNOSES).to_numpy())
+    if std is not None:
+        result[STD_COLUMNS] = std
+        result['disagreement'] = disagreement
+    return result
+
+
+def score_file(input_path, output_path, model_path=MODEL_PATH, chunk_size=DEFAULT_CHUNK_SIZE, has_header=True,
+               cache_size=DEFAULT_MAXSIZE, backend='float'):
+    """Scorează tot fișierul de intrare și scrie rezultatele; returnează (rânduri, secunde)."""
+    predictor = CachedPredictor(model_path, maxsize=cache_size, backend=backend)
+    writer = ResultWriter(output_path)
+
+    total_rows = 0
+    start = time.perf_counter()
+    try:
+        for raw_chunk in iter_input_chunks(input_path, chunk_size, has_header):
+            writer.write(score_chunk(predictor, raw_chunk))
+            total_rows += len(raw_chunk)
+            elapsed = time.perf_counter() - start
+            print(f"  {total_rows} rânduri scorate ({total_rows / max(elapsed, 1e-9):,.0f} rânduri/s)", file=sys.stderr)
+    finally:
+        writer.close()
+
+    stats = predictor.stats()
+    print(f"Cache predicții: {stats['hits']} hit-uri, {stats['misses']} miss-uri, {stats['evictions']} evacuări "
+          f"(rată hit {stats['hit_rate'] * 100:.1f}%)", file=sys.stderr)
+    return total_rows, time.perf_counter() - start
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scorare în lot a vectorilor de simptome (A1-A10, A11, A34) cu modelul UnderMyAISkin.")
+    parser.add_argument('input', help="Fișier CSV sau Parquet cu atributele brute (Parquet necesită pyarrow)")
+    parser.add_argument('output', help="Fișier de ieșire (.csv sau .parquet; Parquet necesită pyarrow)")
+    parser.add_argument('--model', default=MODEL_PATH, help="Calea către modelul .h5 (ponderile .npz sunt exportate automat)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Numărul de rânduri procesate odată")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAXSIZE, help="Numărul maxim de vectori distincți păstrați în cache-ul LRU")
+    parser.add_argument('--backend', choices=('float', 'int8', 'ensemble'), default='float',
+                        help="Motorul de inferență (int8 = model cuantizat, ensemble = ansamblul de lângă .h5)")
+    parser.add_argument('--no-header', action='store_true', help="CSV fără antet: primele 12 coloane sunt A1-A10, A11, A34")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    rows, seconds = score_file(args.input, args.output, args.model, args.chunk_size, not args.no_header, args.cache_size,
+                                args.backend)
+    print(f"Scorare finalizată: {rows} rânduri în {seconds:.2f} s ({rows / max(seconds, 1e-9):,.0f} rânduri/s). Rezultate: {args.output}")
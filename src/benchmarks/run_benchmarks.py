@@ -0,0 +1,162 @@
+# Benchmark-uri pentru căile critice (încărcare, inferență, scalare, BD, alerte), cu rezultate JSON
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(ROOT_DIR)
+from src import database_manager
+from src.triage_common import MODEL_PATH
+from src.preprocessing.transform import transform
+from src.neural_network.numpy_engine import load_inference_engine
+from src.neural_network.prediction_cache import CachedPredictor
+from src.benchmarks.synthetic_cases import sample_cases, populate_database
+
+
+def summarize(samples_s):
+    """Statistici (în microsecunde) pentru o listă de durate măsurate în secunde."""
+    us = np.asarray(samples_s) * 1e6
+    return {
+        'n': int(len(us)),
+        'mean_us': float(us.mean()),
+        'p50_us': float(np.percentile(us, 50)),
+        'p95_us': float(np.percentile(us, 95)),
+        'p99_us': float(np.percentile(us, 99)),
+        'min_us': float(us.min()),
+    }
+
+
+def time_calls(fn, repeat, warmup=10):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def bench_cold_start(runs=3):
+    """Import + încărcare model într-un proces nou, la fel ca DependencyLoader din init_dependencies."""
+    code = (
+        "import time; t0 = time.perf_counter();"
+        "from src.neural_network.prediction_cache import CachedPredictor; t1 = time.perf_counter();"
+        f"CachedPredictor({MODEL_PATH!r}); t2 = time.perf_counter();"
+        "print(t1 - t0, t2 - t1)"
+    )
+    imports, loads = [], []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+        import_s, load_s = map(float, out.stdout.split()[-2:])
+        imports.append(import_s)
+        loads.append(load_s)
+    return {'import': summarize(imports), 'model_load': summarize(loads)}
+
+
+def bench_inference(repeat):
+    model = load_inference_engine(MODEL_PATH)
+    _, _, symptoms = sample_cases(100_000)
+    X = transform(symptoms)
+    results = {'single_row': time_calls(lambda: model.predict(X[:1]), repeat)}
+    for batch_size in (32, 1024, 100_000):
+        batch = X[:batch_size]
+        stats = time_calls(lambda: model.predict(batch), max(5, repeat // 100), warmup=2)
+        stats['rows_per_s'] = batch_size / (stats['mean_us'] / 1e6)
+        results[f'batch_{batch_size}'] = stats
+
+    # Calea cu cache LRU (vectorii repetați nu mai trec prin model)
+    predictor = CachedPredictor(MODEL_PATH)
+    raw = symptoms[:1]
+    results['single_row_cached'] = time_calls(lambda: predictor.predict_raw(raw), repeat)
+    return results
+
+
+def bench_scaling(repeat):
+    """Scalarea unui vector brut (ce face CachedPredictor înaintea modelului, pentru vectorii care nu sunt în cache)."""
+    raw_vector = [2, 2, 0, 3, 0, 0, 0, 0, 1, 0, 0, 55]
+    return {'raw_vector_scaling': time_calls(lambda: transform(raw_vector), repeat)}
+
+
+def bench_database(n_cases, repeat):
+    """Inserări (record_case / record_cases) și latența check_for_epidemic_alert pe o BD cu n_cases cazuri."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'bench_cases.db')
+
+        start = time.perf_counter()
+        populate_database(db_path, n_cases)
+        results['populate_s'] = time.perf_counter() - start
+
+        symptoms = "2,2,0,3,0,0,0,0,1,0,0,55"
+        stats = time_calls(lambda: database_manager.record_case(1, symptoms), repeat)
+        stats['rows_per_s'] = 1e6 / stats['mean_us']
+        results['record_case'] = stats
+
+        bulk = [(1, symptoms)] * 10_000
+        stats = time_calls(lambda: database_manager.record_cases(bulk), 5, warmup=1)
+        stats['rows_per_s'] = len(bulk) / (stats['mean_us'] / 1e6)
+        results['record_cases_bulk_10000'] = stats
+
+        # Reconstruirea ferestrei de alertă la pornire (citește doar cazurile din ultimele ALERT_PERIOD_DAYS zile)
+        results['alert_window_rebuild'] = time_calls(database_manager.initialize_database, 5, warmup=1)
+        # Mesajele de alertă afișate la fiecare apel nu intră în rezultate
+        with contextlib.redirect_stdout(io.StringIO()):
+            results['check_for_epidemic_alert'] = time_calls(database_manager.check_for_epidemic_alert, repeat)
+        # Tendințele din agregatul zilnic (cost proporțional cu zilele, nu cu cazurile)
+        results['class_totals_7_days'] = time_calls(lambda: database_manager.class_totals(7), repeat)
+        results['load_daily_counts_365_days'] = time_calls(lambda: database_manager.load_daily_counts(365), max(5, repeat // 10))
+        database_manager.close_connections()
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_all(n_cases=100_000, repeat=1000):
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'n_cases': n_cases,
+        },
+        'cold_start': bench_cold_start(),
+        'inference': bench_inference(repeat),
+        'scaling': bench_scaling(repeat),
+        'database': bench_database(n_cases, repeat),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark-uri pentru căile critice UnderMyAISkin.")
+    parser.add_argument('--cases', type=int, default=100_000, help="Numărul de cazuri sintetice din BD de test")
+    parser.add_argument('--repeat', type=int, default=1000, help="Numărul de măsurători per micro-benchmark")
+    parser.add_argument('--output', default=None, help="Fișierul JSON cu rezultatele (implicit: afișare la consolă)")
+    args = parser.parse_args()
+
+    results = run_all(args.cases, args.repeat)
+    text = json.dumps(results, indent=4)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+        print(f"Rezultatele au fost salvate în: {args.output}")
+    else:
+        print(text)
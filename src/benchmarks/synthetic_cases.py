@@ -0,0 +1,96 @@
+# Generator de cazuri sintetice pentru tabelul `cases` (pentru benchmark-uri și teste de încărcare)
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src import database_manager
+from src.preprocessing.transform import INPUT_FEATURES
+
+CLEANED_DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'processed', 'dermatology_12features_cleaned.csv'))
+INSERT_CHUNK_SIZE = 100_000
+
+
+def sample_cases(n_cases, days=365, end=None, seed=42, data_path=CLEANED_DATA_PATH):
+    """Cazuri realiste: vectori din setul UCI (cu zgomot pe simptome și vârstă), distribuiți în ultimele `days` zile.
+
+    Returnează (diagnosis_class (N,), prediction_ts (N,) sortat, symptoms (N, 12) uint8).
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.read_csv(data_path)
+    base = df[INPUT_FEATURES].to_numpy(dtype=np.float64)
+    classes = df['Class'].to_numpy()
+
+    # Pornim de la pacienți reali (păstrează corelațiile simptom-clasă și distribuția claselor)
+    idx = rng.integers(0, len(base), n_cases)
+    symptoms = base[idx]
+    # Zgomot: ~10% dintre simptome se mută cu un nivel, vârsta variază cu ±5 ani
+    jitter = rng.choice([-1, 0, 1], size=(n_cases, 10), p=[0.05, 0.9, 0.05])
+    symptoms[:, :10] = np.clip(symptoms[:, :10] + jitter, 0, 3)
+    symptoms[:, 11] = np.clip(symptoms[:, 11] + rng.integers(-5, 6, n_cases), 1, 100)
+
+    # Momentele predicțiilor: uniform în perioadă, cu câteva focare (vârfuri de 3 zile pe o clasă)
+    end_ts = int((end or datetime.now()).timestamp())
+    start_ts = int(((end or datetime.now()) - timedelta(days=days)).timestamp())
+    timestamps = rng.integers(start_ts, end_ts, n_cases)
+    n_outbreaks = max(1, days // 60)
+    for _ in range(n_outbreaks):
+        outbreak_class = rng.integers(1, 7)
+        outbreak_start = rng.integers(start_ts, max(start_ts + 1, end_ts - 3 * 86400))
+        members = rng.random(n_cases) < 0.01
+        timestamps[members] = outbreak_start + rng.integers(0, 3 * 86400, members.sum())
+        idx[members] = rng.choice(np.flatnonzero(classes == outbreak_class), members.sum())
+        symptoms[members] = base[idx[members]]
+
+    order = np.argsort(timestamps, kind='stable')
+    return classes[idx][order], timestamps[order], symptoms[order].astype(np.uint8)
+
+
+def populate_database(db_path, n_cases, days=365, seed=42):
+    """Scrie `n_cases` cazuri sintetice în baza de date, în tranzacții de câte INSERT_CHUNK_SIZE rânduri."""
+    database_manager.configure_database(db_path)
+    database_manager.initialize_database()
+
+    start = time.perf_counter()
+    written = 0
+    # Generăm și scriem pe bucăți, ca memoria să rămână constantă și pentru 10^7 cazuri
+    for chunk_start in range(0, n_cases, INSERT_CHUNK_SIZE):
+        chunk_size = min(INSERT_CHUNK_SIZE, n_cases - chunk_start)
+        classes, timestamps, symptoms = sample_cases(chunk_size, days, seed=seed + chunk_start)
+        packed = symptoms.tobytes()
+        width = database_manager.SYMPTOMS_WIDTH
+        rows = [
+            (int(c), datetime.fromtimestamp(int(ts)).strftime('%Y-%m-%d %H:%M:%S'),
+             packed[i * width:(i + 1) * width], None, int(ts))
+            for i, (c, ts) in enumerate(zip(classes, timestamps))
+        ]
+        # Agregatul zilnic este actualizat în aceeași tranzacție, ca în record_cases
+        daily = {}
+        for row in rows:
+            key = (row[1][:10], row[0])
+            daily[key] = daily.get(key, 0) + 1
+        with database_manager.get_connection() as conn, conn:
+            conn.executemany(database_manager.INSERT_CASE_SQL, rows)
+            conn.executemany(database_manager.UPSERT_DAILY_COUNT_SQL, [(d, c, n) for (d, c), n in daily.items()])
+        written += chunk_size
+        print(f"  {written} cazuri scrise ({written / (time.perf_counter() - start):,.0f} cazuri/s)")
+
+    # Fereastra de alertă trebuie reconstruită după scrierile directe în tabel
+    database_manager.initialize_database()
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Populează o bază de date `cases` cu cazuri sintetice.")
+    parser.add_argument('db', help="Fișierul bazei de date de populat")
+    parser.add_argument('--cases', type=int, default=100_000, help="Numărul de cazuri (10^4 - 10^7)")
+    parser.add_argument('--days', type=int, default=365, help="Perioada acoperită (zile în urmă de acum)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    n = populate_database(args.db, args.cases, args.days, args.seed)
+    print(f"Baza de date {args.db} conține acum {n} cazuri sintetice noi.")
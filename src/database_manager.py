@@ -1,71 +1,563 @@
+import argparse
+import heapq
+import json
 import sqlite3
+import queue
+import threading
+import numpy as np
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import os
+import sys
 
-# Nume baza de date
-DB_NAME = 'undermyaiskin_cases.db'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.metrics import instrument
+from src.triage_common import DIAGNOSES
+
+# Calea bazei de date: absolută (nu depinde de directorul curent), configurabilă prin variabila de mediu
+# UNDERMYAISKIN_DB_PATH sau prin configure_database()
+DEFAULT_DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'undermyaiskin_cases.db'))
+DB_NAME = os.path.abspath(os.environ.get('UNDERMYAISKIN_DB_PATH', DEFAULT_DB_PATH))
 
 # Pragul de alerta (am hotarat ca 5 pacienti intr-o saptamana sa porneasca alerta)
-ALERT_THRESHOLD = 5 
-ALERT_PERIOD_DAYS = 7 
+ALERT_THRESHOLD = 5
+ALERT_PERIOD_DAYS = 7
+
+# Setări SQLite: WAL permite citiri concurente cu scrierea, iar synchronous=NORMAL evită un fsync la fiecare commit
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",   # ~16 MB cache de pagini
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Interogările sunt constante de modul: modulul sqlite3 păstrează statement-urile pregătite
+# în cache-ul fiecărei conexiuni și le refolosește pentru același text SQL
+CREATE_CASES_SQL = '''
+    CREATE TABLE IF NOT EXISTS cases (
+        id INTEGER PRIMARY KEY,
+        diagnosis_class INTEGER NOT NULL,
+        prediction_date TEXT NOT NULL,
+        symptoms_vector BLOB NOT NULL,
+        quiz_responses TEXT,
+        prediction_ts INTEGER,
+        confirmed_class INTEGER,
+        confirmed_seq INTEGER
+    )
+'''
+# prediction_ts = momentul predicției ca epoch (secunde întregi), indexat pentru interogări pe ferestre de timp
+CREATE_TS_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_cases_prediction_ts ON cases (prediction_ts)"
+# Completare pentru baze de date create înainte de coloana prediction_ts (prediction_date este oră locală)
+BACKFILL_TS_SQL = '''
+    UPDATE cases SET prediction_ts = CAST(strftime('%s', prediction_date, 'utc') AS INTEGER)
+    WHERE prediction_ts IS NULL
+'''
+INSERT_CASE_SQL = '''
+    INSERT INTO cases (diagnosis_class, prediction_date, symptoms_vector, quiz_responses, prediction_ts)
+    VALUES (?, ?, ?, ?, ?)
+'''
+CASES_ARRAY_SQL = '''
+    SELECT diagnosis_class, prediction_ts, symptoms_vector
+    FROM cases
+    WHERE id > ?
+    ORDER BY id
+'''
+TEXT_ROWS_BATCH_SQL = '''
+    SELECT id, symptoms_vector, quiz_responses
+    FROM cases
+    WHERE id > ? AND typeof(symptoms_vector) = 'text'
+    ORDER BY id
+    LIMIT ?
+'''
+UPDATE_ENCODED_SQL = "UPDATE cases SET symptoms_vector = ?, quiz_responses = ? WHERE id = ?"
+# Cazurile noi (id în (ultimul id văzut, max_id]) din fereastra de alertă, pentru sincronizarea ferestrei
+WINDOW_CASES_SQL = '''
+    SELECT prediction_ts, diagnosis_class
+    FROM cases
+    WHERE id > ? AND id <= ? AND prediction_ts >= ?
+'''
+MAX_CASE_ID_SQL = "SELECT MAX(id) FROM cases"
+
+# Agregat zilnic pe clasă (ziua locală din prediction_date), actualizat în aceeași tranzacție cu inserarea
+# cazului, astfel încât tendințele se citesc în timp proporțional cu numărul de zile, nu de cazuri
+CREATE_DAILY_COUNTS_SQL = '''
+    CREATE TABLE IF NOT EXISTS daily_counts (
+        day TEXT NOT NULL,
+        diagnosis_class INTEGER NOT NULL,
+        n INTEGER NOT NULL,
+        PRIMARY KEY (day, diagnosis_class)
+    ) WITHOUT ROWID
+'''
+UPSERT_DAILY_COUNT_SQL = '''
+    INSERT INTO daily_counts (day, diagnosis_class, n) VALUES (?, ?, ?)
+    ON CONFLICT (day, diagnosis_class) DO UPDATE SET n = n + excluded.n
+'''
+REBUILD_DAILY_COUNTS_SQL = '''
+    INSERT INTO daily_counts (day, diagnosis_class, n)
+    SELECT substr(prediction_date, 1, 10), diagnosis_class, COUNT(*)
+    FROM cases
+    GROUP BY 1, 2
+'''
+# Doar clasele valide (1..n_classes): rândurile copiate nevalidate (ex. din site_sync) nu ajung în altă coloană
+DAILY_COUNTS_SQL = '''
+    SELECT day, diagnosis_class, n
+    FROM daily_counts
+    WHERE day >= ? AND day <= ? AND diagnosis_class BETWEEN 1 AND ?
+'''
+DAILY_COUNTS_RANGE_SQL = "SELECT MIN(day), MAX(day) FROM daily_counts WHERE diagnosis_class BETWEEN 1 AND ?"
+# Eticheta confirmată de medic (NULL până la confirmare); diagnosis_class rămâne predicția modelului.
+# confirmed_seq = ordinea confirmărilor (crește la fiecare confirmare, inclusiv la o corectare), deci
+# un caz vechi confirmat târziu apare tot după watermark-ul fine-tuning-ului
+CONFIRM_CASE_SQL = '''
+    UPDATE cases SET confirmed_class = ?, confirmed_seq = (SELECT COALESCE(MAX(confirmed_seq), 0) + 1 FROM cases)
+    WHERE id = ?
+'''
+CREATE_CONFIRMED_SEQ_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_cases_confirmed_seq ON cases (confirmed_seq)"
+# Bazele create înainte de confirmed_seq: confirmările existente primesc ordinea id-urilor
+BACKFILL_CONFIRMED_SEQ_SQL = "UPDATE cases SET confirmed_seq = id WHERE confirmed_class IS NOT NULL AND confirmed_seq IS NULL"
+# Cazurile etichetate, citite pe bucăți după poziția lor (paginare pe cheie, fără OFFSET):
+# ordinea confirmărilor pentru etichetele confirmate, id-ul pentru predicțiile înregistrate
+LABELLED_CASES_BATCH_SQL = '''
+    SELECT confirmed_seq, confirmed_class, symptoms_vector
+    FROM cases
+    WHERE confirmed_seq > ?
+    ORDER BY confirmed_seq
+    LIMIT ?
+'''
+PREDICTED_CASES_BATCH_SQL = '''
+    SELECT id, diagnosis_class, symptoms_vector
+    FROM cases
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+'''
+# Istoricul rulărilor de fine-tuning; last_seq al ultimei rulări cu aceeași sursă de etichete
+# ('confirmed' = confirmed_seq, 'predicted' = id) este watermark-ul următoarei
+CREATE_FINE_TUNE_RUNS_SQL = '''
+    CREATE TABLE IF NOT EXISTS fine_tune_runs (
+        id INTEGER PRIMARY KEY,
+        finished_at TEXT NOT NULL,
+        model_path TEXT NOT NULL,
+        model_sha256 TEXT NOT NULL,
+        label_source TEXT NOT NULL,
+        first_seq INTEGER NOT NULL,
+        last_seq INTEGER NOT NULL,
+        n_cases INTEGER NOT NULL,
+        n_steps INTEGER NOT NULL
+    )
+'''
+INSERT_FINE_TUNE_RUN_SQL = '''
+    INSERT INTO fine_tune_runs (finished_at, model_path, model_sha256, label_source, first_seq, last_seq, n_cases, n_steps)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+FINE_TUNE_WATERMARK_SQL = "SELECT COALESCE(MAX(last_seq), 0) FROM fine_tune_runs WHERE label_source = ?"
+CLASS_TOTALS_SQL = '''
+    SELECT diagnosis_class, SUM(n)
+    FROM daily_counts
+    WHERE day >= ? AND day <= ?
+    GROUP BY diagnosis_class
+    ORDER BY diagnosis_class
+'''
+
+
+# --- Stocare compactă ---
+# Cele 12 atribute brute (A1-A10 0-3, A11 0/1, A34 vârsta) sunt stocate ca BLOB de 12 octeți (uint8),
+# în loc de textul "2,2,0,3,...,55". Bazele vechi pot fi convertite cu migrate_compact_storage().
+SYMPTOMS_WIDTH = 12
+
+
+def encode_symptoms(symptoms_vector):
+    """Vectorul de simptome (text "2,2,...,55" sau secvență de 12 valori) -> 12 octeți."""
+    if isinstance(symptoms_vector, (bytes, memoryview)):
+        # Un BLOB cu altă lungime ar strica reshape-ul (-1, 12) pentru tot tabelul la citire
+        if len(symptoms_vector) != SYMPTOMS_WIDTH:
+            raise ValueError(f"Vectorul de simptome binar trebuie să aibă {SYMPTOMS_WIDTH} octeți: {len(symptoms_vector)}")
+        return bytes(symptoms_vector)
+    if isinstance(symptoms_vector, str):
+        symptoms_vector = symptoms_vector.split(',')
+    values = np.rint(np.asarray(symptoms_vector, dtype=np.float64))
+    if values.shape != (SYMPTOMS_WIDTH,) or values.min() < 0 or values.max() > 255:
+        raise ValueError(f"Vectorul de simptome trebuie să aibă {SYMPTOMS_WIDTH} valori întregi între 0 și 255: {symptoms_vector}")
+    return values.astype(np.uint8).tobytes()
+
+
+def decode_symptoms(value):
+    """BLOB-ul de 12 octeți (sau textul vechi) -> lista celor 12 atribute."""
+    if isinstance(value, str):
+        return [int(round(float(v))) for v in value.split(',')]
+    return list(bytes(value))
+
+
+def encode_quiz_responses(quiz_responses):
+    """Răspunsurile goale ('' sau '{}') devin NULL; JSON-ul valid este salvat fără spații."""
+    if quiz_responses in (None, '', '{}'):
+        return None
+    try:
+        return json.dumps(json.loads(quiz_responses), separators=(',', ':'), ensure_ascii=False)
+    except (TypeError, ValueError):
+        return quiz_responses
+
+
+class ConnectionPool:
+    """Pool mic de conexiuni SQLite de lungă durată, refolosite de GUI, workeri și servicii."""
+
+    def __init__(self, db_path, max_idle=4):
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self._idle = queue.LifoQueue()
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_path, cached_statements=128, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Împrumută o conexiune din pool și o returnează la final."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        try:
+            yield conn
+        finally:
+            if self._idle.qsize() < self.max_idle:
+                self._idle.put(conn)
+            else:
+                conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class AlertWindow:
+    """Numărătoare pe clasă pentru cazurile din ultimele ALERT_PERIOD_DAYS zile (fereastră glisantă în memorie).
+
+    Fereastra este sincronizată din tabel înainte de fiecare verificare: se citesc doar cazurile cu id mai mare
+    decât ultimul id văzut, deci sunt numărate și cazurile scrise de alte procese (serverul de inferență,
+    scorarea în lot, sincronizarea clinicilor). O verificare costă O(clase + cazuri noi), nu O(cazuri din fereastră).
+    """
+
+    def __init__(self):
+        self._events = []   # heap (prediction_ts, diagnosis_class): cazurile nu sosesc neapărat în ordine cronologică
+        self._counts = {}
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def _add(self, prediction_ts, diagnosis_class):
+        heapq.heappush(self._events, (prediction_ts, diagnosis_class))
+        self._counts[diagnosis_class] = self._counts.get(diagnosis_class, 0) + 1
+
+    def sync(self, conn, start_ts):
+        """Adaugă cazurile inserate în tabel după ultima sincronizare (de orice proces)."""
+        with self._lock:
+            max_id = conn.execute(MAX_CASE_ID_SQL).fetchone()[0] or 0
+            if max_id < self._last_id:
+                # Tabelul a fost golit sau înlocuit: reconstruim fereastra de la zero
+                self._events, self._counts, self._last_id = [], {}, 0
+            for prediction_ts, diagnosis_class in conn.execute(WINDOW_CASES_SQL, (self._last_id, max_id, start_ts)):
+                self._add(prediction_ts, diagnosis_class)
+            self._last_id = max_id
+
+    def evict(self, start_ts):
+        """Scoate cazurile mai vechi decât începutul ferestrei."""
+        with self._lock:
+            while self._events and self._events[0][0] < start_ts:
+                _, diagnosis_class = heapq.heappop(self._events)
+                self._counts[diagnosis_class] -= 1
+                if self._counts[diagnosis_class] == 0:
+                    del self._counts[diagnosis_class]
+
+    def classes_over(self, threshold):
+        with self._lock:
+            return sorted(c for c, n in self._counts.items() if n >= threshold)
+
+
+_pool = ConnectionPool(DB_NAME)
+_alert_window = None
+
+
+def configure_database(db_path):
+    """Schimbă fișierul bazei de date (închide conexiunile deschise către fișierul anterior)."""
+    global DB_NAME, _pool, _alert_window
+    _pool.close_all()
+    DB_NAME = os.path.abspath(db_path)
+    _pool = ConnectionPool(DB_NAME)
+    _alert_window = None
+
+
+def get_connection():
+    """Context manager care oferă o conexiune persistentă din pool."""
+    return _pool.connection()
+
+
+def close_connections():
+    _pool.close_all()
+
 
+def alert_window_start(now=None):
+    """Începutul ferestrei de alertă, ca epoch în secunde întregi."""
+    start_date = (now or datetime.now()) - timedelta(days=ALERT_PERIOD_DAYS)
+    return int(start_date.timestamp())
+
+def get_alert_window():
+    """Fereastra de alertă a procesului curent, sincronizată din tabel la fiecare apel."""
+    global _alert_window
+    if _alert_window is None:
+        _alert_window = AlertWindow()
+    start_ts = alert_window_start()
+    with get_connection() as conn:
+        _alert_window.sync(conn, start_ts)
+    _alert_window.evict(start_ts)
+    return _alert_window
+
+@instrument('db_initialize')
 def initialize_database():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS cases (
-            id INTEGER PRIMARY KEY,
-            diagnosis_class INTEGER NOT NULL,
-            prediction_date TEXT NOT NULL,
-            symptoms_vector TEXT NOT NULL,
-            quiz_responses TEXT  
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    global _alert_window
+    with get_connection() as conn, conn:
+        conn.execute(CREATE_CASES_SQL)
+
+        # Migrare: bazele de date mai vechi nu au coloana prediction_ts
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(cases)")]
+        if 'prediction_ts' not in columns:
+            conn.execute("ALTER TABLE cases ADD COLUMN prediction_ts INTEGER")
+        conn.execute(BACKFILL_TS_SQL)
+        conn.execute(CREATE_TS_INDEX_SQL)
+        # Migrare: eticheta confirmată (pentru fine-tuning) și ordinea confirmărilor lipsesc din bazele mai vechi
+        if 'confirmed_class' not in columns:
+            conn.execute("ALTER TABLE cases ADD COLUMN confirmed_class INTEGER")
+        if 'confirmed_seq' not in columns:
+            conn.execute("ALTER TABLE cases ADD COLUMN confirmed_seq INTEGER")
+            conn.execute(BACKFILL_CONFIRMED_SEQ_SQL)
+        conn.execute(CREATE_CONFIRMED_SEQ_INDEX_SQL)
+        conn.execute(CREATE_FINE_TUNE_RUNS_SQL)
+
+        # Migrare: agregatul zilnic este completat din tabelul `cases` la prima creare
+        has_rollup = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_counts'").fetchone()
+        conn.execute(CREATE_DAILY_COUNTS_SQL)
+        if not has_rollup:
+            conn.execute(REBUILD_DAILY_COUNTS_SQL)
+
+    # Reconstruim fereastra glisantă a alertelor din tabel
+    _alert_window = None
+    get_alert_window()
 
+@instrument('db_record_case')
 def record_case(diagnosis_class, symptoms_vector, quiz_responses=""):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    prediction_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
+    """Înregistrează un caz și returnează id-ul lui (folosit la confirmarea diagnosticului, --confirm)."""
+    now = datetime.now()
+    prediction_date = now.strftime('%Y-%m-%d %H:%M:%S')
+    prediction_ts = int(now.timestamp())
+
     # Eroarea de la utilizarea 'diagnosis_date' a fost corectată aici, folosind 'diagnosis_class'
-    cursor.execute('''
-        INSERT INTO cases (diagnosis_class, prediction_date, symptoms_vector, quiz_responses)
-        VALUES (?, ?, ?, ?)
-    ''', (diagnosis_class, prediction_date, symptoms_vector, quiz_responses))
-    
-    conn.commit()
-    conn.close()
-    
+    with get_connection() as conn, conn:
+        case_id = conn.execute(INSERT_CASE_SQL, (diagnosis_class, prediction_date, encode_symptoms(symptoms_vector),
+                                                 encode_quiz_responses(quiz_responses), prediction_ts)).lastrowid
+        conn.execute(UPSERT_DAILY_COUNT_SQL, (prediction_date[:10], diagnosis_class, 1))
+    return case_id
+
+@instrument('db_record_cases')
+def record_cases(cases):
+    """Înregistrează mai multe cazuri într-o singură tranzacție.
+
+    `cases` conține tupluri (diagnosis_class, symptoms_vector) sau
+    (diagnosis_class, symptoms_vector, quiz_responses). Returnează numărul de cazuri scrise.
+    """
+    now = datetime.now()
+    prediction_date = now.strftime('%Y-%m-%d %H:%M:%S')
+    prediction_ts = int(now.timestamp())
+    rows = [
+        (case[0], prediction_date, encode_symptoms(case[1]),
+         encode_quiz_responses(case[2] if len(case) > 2 else ""), prediction_ts)
+        for case in cases
+    ]
+
+    per_class = {}
+    for row in rows:
+        per_class[row[0]] = per_class.get(row[0], 0) + 1
+
+    with get_connection() as conn, conn:
+        conn.executemany(INSERT_CASE_SQL, rows)
+        conn.executemany(UPSERT_DAILY_COUNT_SQL, [(prediction_date[:10], c, n) for c, n in per_class.items()])
+    return len(rows)
+
+@instrument('db_check_epidemic_alert')
 def check_for_epidemic_alert():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    start_date = datetime.now() - timedelta(days=ALERT_PERIOD_DAYS)
-    start_date_str = start_date.strftime('%Y-%m-%d %H:%M:%S')
-    
-    cursor.execute('''
-        SELECT diagnosis_class, COUNT(*) 
-        FROM cases
-        WHERE prediction_date >= ?
-        GROUP BY diagnosis_class
-        HAVING COUNT(*) >= ?
-    ''', (start_date_str, ALERT_THRESHOLD))
-    
-    focare = [row[0] for row in cursor.fetchall()]
-    
-    conn.close()
-    
+    # Fereastra glisantă în memorie: preluăm cazurile noi din tabel, eliminăm cazurile expirate
+    # și citim numărătorile pe clasă
+    focare = get_alert_window().classes_over(ALERT_THRESHOLD)
+
     if focare:
         print(f"!!! ALERTĂ EPIDEMICĂ: Focare detectate pentru clasele: {focare}")
         return focare
     else:
         return []
 
-if __name__ == "__main__":
-    # La rularea directă a scriptului, doar inițializăm DB pentru utilizare
+@instrument('db_load_cases_array')
+def load_cases_array(after_id=0):
+    """Întreg tabelul (sau rândurile cu id > after_id) ca array-uri NumPy, fără parsare rând cu rând.
+
+    Returnează (diagnosis_class (N,), prediction_ts (N,), symptoms (N, 12) uint8).
+    """
+    with get_connection() as conn:
+        rows = conn.execute(CASES_ARRAY_SQL, (after_id,)).fetchall()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty((0, SYMPTOMS_WIDTH), dtype=np.uint8)
+
+    classes, timestamps, vectors = zip(*rows)
+    try:
+        packed = b''.join(vectors)
+    except TypeError:
+        # Bază de date nemigrată: conținut mixt text/BLOB
+        packed = b''.join(map(encode_symptoms, vectors))
+    if len(packed) != len(vectors) * SYMPTOMS_WIDTH:
+        # Un BLOB cu lungime greșită: encode_symptoms îl semnalează cu un mesaj clar
+        packed = b''.join(map(encode_symptoms, vectors))
+    symptoms = np.frombuffer(packed, dtype=np.uint8).reshape(-1, SYMPTOMS_WIDTH)
+    return np.array(classes, dtype=np.int64), np.array(timestamps, dtype=np.int64), symptoms
+
+def confirm_case(case_id, confirmed_class):
+    """Salvează diagnosticul confirmat de medic (clasa 1-6) pentru un caz înregistrat; returnează 0 dacă cazul nu există."""
+    if confirmed_class not in DIAGNOSES:
+        raise ValueError(f"Clasa confirmată trebuie să fie între {min(DIAGNOSES)} și {max(DIAGNOSES)}: {confirmed_class}")
+    with get_connection() as conn, conn:
+        return conn.execute(CONFIRM_CASE_SQL, (confirmed_class, case_id)).rowcount
+
+def label_source(use_predicted=False):
+    return 'predicted' if use_predicted else 'confirmed'
+
+def iter_labelled_cases(after_seq=0, chunk_size=1024, use_predicted=False):
+    """Generator peste cazurile etichetate cu poziția > after_seq, în bucăți de câte `chunk_size` rânduri.
+
+    Fiecare bucată este (poziții (N,), clase 1-6 (N,), symptoms (N, 12) uint8). Implicit doar cazurile cu
+    eticheta confirmată, în ordinea confirmării (poziția = confirmed_seq); cu use_predicted=True se folosește
+    predicția înregistrată (diagnosis_class), în ordinea id-urilor (poziția = id).
+    """
+    sql = PREDICTED_CASES_BATCH_SQL if use_predicted else LABELLED_CASES_BATCH_SQL
+    last_seq = after_seq
+    while True:
+        with get_connection() as conn:
+            rows = conn.execute(sql, (last_seq, chunk_size)).fetchall()
+        if not rows:
+            return
+        seqs, labels, vectors = zip(*rows)
+        symptoms = np.frombuffer(b''.join(map(encode_symptoms, vectors)), dtype=np.uint8).reshape(-1, SYMPTOMS_WIDTH)
+        last_seq = seqs[-1]
+        yield np.array(seqs, dtype=np.int64), np.array(labels, dtype=np.int64), symptoms
+
+def fine_tune_watermark(use_predicted=False):
+    """Ultima poziție procesată de o rulare de fine-tuning cu aceeași sursă de etichete (0 dacă nu a existat niciuna)."""
+    with get_connection() as conn:
+        return conn.execute(FINE_TUNE_WATERMARK_SQL, (label_source(use_predicted),)).fetchone()[0]
+
+def record_fine_tune_run(model_path, model_sha256, first_seq, last_seq, n_cases, n_steps, use_predicted=False):
+    with get_connection() as conn, conn:
+        conn.execute(INSERT_FINE_TUNE_RUN_SQL, (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), model_path, model_sha256,
+                                                label_source(use_predicted), first_seq, last_seq, n_cases, n_steps))
+
+def rebuild_daily_counts():
+    """Recalculează agregatul zilnic din tabelul `cases` (pentru baze vechi sau după scrieri directe în `cases`)."""
     initialize_database()
-    print(f"Managerul de baze de date este gata. Fișier DB: {DB_NAME}")
\ No newline at end of file
+    with get_connection() as conn, conn:
+        conn.execute("DELETE FROM daily_counts")
+        conn.execute(REBUILD_DAILY_COUNTS_SQL)
+        return conn.execute("SELECT COUNT(*) FROM daily_counts").fetchone()[0]
+
+def _day_range(days, end):
+    end_day = end or datetime.now().date()
+    return end_day - timedelta(days=days - 1), end_day
+
+@instrument('db_load_daily_counts')
+def load_daily_counts(days, end=None, n_classes=6):
+    """Numărul de cazuri pe zi și clasă pentru ultimele `days` zile (inclusiv ziua `end`), doar din agregat.
+
+    Returnează (lista zilelor datetime.date, matricea (days, n_classes) int64); zilele fără cazuri au 0.
+    """
+    start_day, end_day = _day_range(days, end)
+    with get_connection() as conn:
+        rows = conn.execute(DAILY_COUNTS_SQL, (start_day.isoformat(), end_day.isoformat(), n_classes)).fetchall()
+
+    day_list = [start_day + timedelta(days=k) for k in range(days)]
+    day_index = {day.isoformat(): k for k, day in enumerate(day_list)}
+    counts = np.zeros((days, n_classes), dtype=np.int64)
+    for day, diagnosis_class, n in rows:
+        counts[day_index[day], diagnosis_class - 1] = n
+    return day_list, counts
+
+def daily_counts_range(n_classes=6):
+    """(prima zi, ultima zi) cu cazuri în agregat, ca datetime.date; None dacă agregatul este gol."""
+    with get_connection() as conn:
+        first_day, last_day = conn.execute(DAILY_COUNTS_RANGE_SQL, (n_classes,)).fetchone()
+    if first_day is None:
+        return None
+    return datetime.strptime(first_day, '%Y-%m-%d').date(), datetime.strptime(last_day, '%Y-%m-%d').date()
+
+def class_totals(days, end=None):
+    """Totalul cazurilor pe clasă în ultimele `days` zile calendaristice: {clasă: număr}, doar din agregat."""
+    start_day, end_day = _day_range(days, end)
+    with get_connection() as conn:
+        return dict(conn.execute(CLASS_TOTALS_SQL, (start_day.isoformat(), end_day.isoformat())).fetchall())
+
+def migrate_compact_storage(batch_size=10000, vacuum=False):
+    """Convertește pe loc, în tranzacții de câte `batch_size` rânduri, vectorii text în BLOB-uri de 12 octeți."""
+    initialize_database()
+    converted = 0
+    last_id = 0
+    with get_connection() as conn:
+        while True:
+            rows = conn.execute(TEXT_ROWS_BATCH_SQL, (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            with conn:
+                conn.executemany(UPDATE_ENCODED_SQL, [
+                    (encode_symptoms(symptoms), encode_quiz_responses(quiz), case_id)
+                    for case_id, symptoms, quiz in rows
+                ])
+            last_id = rows[-1][0]
+            converted += len(rows)
+            print(f"  {converted} cazuri convertite...")
+        if vacuum:
+            # Recuperăm spațiul eliberat pe disc
+            conn.execute("VACUUM")
+    return converted
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Managerul bazei de date UnderMyAISkin.")
+    parser.add_argument('--db', help="Calea către fișierul bazei de date (implicit: UNDERMYAISKIN_DB_PATH sau baza din rădăcina proiectului)")
+    parser.add_argument('--migrate', action='store_true', help="Convertește vectorii de simptome text în stocarea binară compactă")
+    parser.add_argument('--batch-size', type=int, default=10000, help="Rânduri convertite per tranzacție la migrare")
+    parser.add_argument('--rebuild-daily-counts', action='store_true', help="Recalculează agregatul zilnic daily_counts din tabelul cases")
+    parser.add_argument('--vacuum', action='store_true', help="Rulează VACUUM după migrare pentru a micșora fișierul")
+    parser.add_argument('--confirm', nargs=2, type=int, metavar=('CASE_ID', 'CLASS'),
+                        help="Înregistrează diagnosticul confirmat de medic (clasa 1-6) pentru cazul CASE_ID")
+    args = parser.parse_args()
+    if args.confirm and args.confirm[1] not in DIAGNOSES:
+        parser.error(f"Clasa confirmată trebuie să fie între {min(DIAGNOSES)} și {max(DIAGNOSES)}.")
+
+    if args.db:
+        configure_database(args.db)
+
+    if args.migrate:
+        converted = migrate_compact_storage(args.batch_size, args.vacuum)
+        print(f"Migrare finalizată: {converted} cazuri convertite în {DB_NAME}")
+    elif args.confirm:
+        initialize_database()
+        case_id, confirmed_class = args.confirm
+        if confirm_case(case_id, confirmed_class):
+            print(f"Cazul {case_id} a fost confirmat ca {DIAGNOSES[confirmed_class]} (clasa {confirmed_class}).")
+        else:
+            print(f"Cazul {case_id} nu există în {DB_NAME}.")
+            sys.exit(1)
+    elif args.rebuild_daily_counts:
+        n_rows = rebuild_daily_counts()
+        print(f"Agregatul zilnic a fost recalculat: {n_rows} rânduri (zi, clasă) în {DB_NAME}")
+    else:
+        # La rularea directă a scriptului, doar inițializăm DB pentru utilizare
+        initialize_database()
+        print(f"Managerul de baze de date este gata. Fișier DB: {DB_NAME}")
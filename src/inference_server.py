@@ -0,0 +1,236 @@
+# Serviciu HTTP local pentru modelul de triaj, cu grupare dinamică a cererilor (micro-batching)
+import argparse
+import asyncio
+import json
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.triage_common import MODEL_PATH, DIAGNOSES, RECOMMENDATIONS, INPUT_FEATURES
+from src.neural_network.prediction_cache import CachedPredictor, DEFAULT_MAXSIZE
+from src.neural_network.model_registry import REGISTRY_DIR
+from src.metrics import registry
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# Numărul maxim de vectori dintr-un forward pass și cât așteptăm după prima cerere pentru a umple batch-ul
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT_MS = 2.0
+
+HTTP_STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class MicroBatcher:
+    """Colectează cererile concurente și le servește printr-un singur forward pass."""
+
+    def __init__(self, predictor, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = asyncio.Queue()
+        self.batches_served = 0
+        self.vectors_served = 0
+
+    async def predict(self, raw_vectors):
+        """Pune vectorii brute (N, 12) în coadă și așteaptă (probabilități (N, 6), deviație standard, dezacord).
+
+        Deviația standard (N, 6) și dezacordul (N,) există doar pentru backend-ul 'ensemble'; altfel sunt None.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((raw_vectors, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Așteptăm prima cerere, apoi adunăm altele până la max_batch_size sau max_wait
+            pending = [await self.queue.get()]
+            n_rows = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+            while n_rows < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                n_rows += len(item[0])
+
+            batch = np.concatenate([vectors for vectors, _ in pending])
+            try:
+                # Inferența rulează în afara buclei asyncio, pentru a nu bloca acceptarea conexiunilor
+                outputs = await loop.run_in_executor(None, self.predictor.predict_raw_with_uncertainty, batch)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            # Împărțim rezultatul înapoi pe cereri
+            offset = 0
+            for vectors, future in pending:
+                if not future.done():
+                    future.set_result(tuple(None if values is None else values[offset:offset + len(vectors)]
+                                            for values in outputs))
+                offset += len(vectors)
+            self.batches_served += 1
+            self.vectors_served += n_rows
+
+
+def format_result(probabilities, std=None, disagreement=None):
+    """Clasamentul celor 6 diagnostice pentru un vector, plus recomandarea pentru Top 1.
+
+    Cu backend-ul 'ensemble', fiecare clasă primește și deviația standard între membri, iar rezultatul primește
+    câmpul 'disagreement' (fracția membrilor care nu votează clasa Top 1).
+    """
+    top_indices = np.argsort(probabilities)[::-1]
+    max_class = int(top_indices[0]) + 1
+    ranking = []
+    for index in top_indices:
+        entry = {'class': int(index) + 1, 'diagnosis': DIAGNOSES[int(index) + 1],
+                 'probability': float(probabilities[index])}
+        if std is not None:
+            entry['std'] = float(std[index])
+        ranking.append(entry)
+    result = {
+        'top_class': max_class,
+        'diagnosis': DIAGNOSES[max_class],
+        'recommendation': RECOMMENDATIONS.get(max_class, 'Consultați un medic specialist.'),
+        'ranking': ranking,
+    }
+    if disagreement is not None:
+        result['disagreement'] = float(disagreement)
+    return result
+
+
+def parse_vectors(payload):
+    """Acceptă {"vector": [...12]} sau {"vectors": [[...12], ...]} și returnează un array (N, 12)."""
+    if 'vectors' in payload:
+        vectors = payload['vectors']
+    elif 'vector' in payload:
+        vectors = [payload['vector']]
+    else:
+        raise ValueError("Câmpul 'vector' sau 'vectors' lipsește.")
+    array = np.asarray(vectors, dtype=np.float32)
+    if array.ndim != 2 or array.shape[0] == 0 or array.shape[1] != len(INPUT_FEATURES):
+        raise ValueError(f"Fiecare vector trebuie să aibă {len(INPUT_FEATURES)} valori ({', '.join(INPUT_FEATURES)}).")
+    return array
+
+
+class InferenceServer:
+    """Server HTTP/1.1 minimal (asyncio): POST /predict și GET /health."""
+
+    def __init__(self, batcher):
+        self.batcher = batcher
+        self.started_at = time.time()
+
+    async def handle_request(self, method, path, body):
+        if path == '/health':
+            return 200, {
+                'status': 'ok',
+                'uptime_s': round(time.time() - self.started_at, 1),
+                'batches_served': self.batcher.batches_served,
+                'vectors_served': self.batcher.vectors_served,
+                'cache': self.batcher.predictor.stats(),
+                'latency': registry.snapshot(),
+            }
+        if path != '/predict':
+            return 404, {'error': f"Ruta {path} nu există."}
+        if method != 'POST':
+            return 405, {'error': "Folosiți POST pentru /predict."}
+
+        try:
+            vectors = parse_vectors(json.loads(body or b'{}'))
+        except (ValueError, TypeError) as e:
+            return 400, {'error': str(e)}
+        probabilities, std, disagreement = await self.batcher.predict(vectors)
+        if std is None:
+            return 200, {'results': [format_result(p) for p in probabilities]}
+        return 200, {'results': [format_result(p, s, d) for p, s, d in zip(probabilities, std, disagreement)]}
+
+    async def handle_client(self, reader, writer):
+        try:
+            # Conexiuni keep-alive: servim cereri până când clientul închide conexiunea
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                try:
+                    status, response = await self.handle_request(method, path, body)
+                except Exception as e:
+                    status, response = 500, {'error': str(e)}
+
+                data = json.dumps(response, ensure_ascii=False).encode('utf-8')
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_STATUS[status]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(model_path=MODEL_PATH, host=DEFAULT_HOST, port=DEFAULT_PORT,
+                max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS, cache_size=DEFAULT_MAXSIZE,
+                backend='float', registry_dir=REGISTRY_DIR):
+    predictor = CachedPredictor(model_path, maxsize=cache_size, backend=backend, registry_dir=registry_dir)
+    # Promovările din registru (sau fișierele modificate) sunt preluate în fundal, fără pauză în servire
+    predictor.start_watcher()
+    batcher = MicroBatcher(predictor, max_batch_size, max_wait_ms)
+    server = InferenceServer(batcher)
+
+    batch_task = asyncio.create_task(batcher.run())
+    http_server = await asyncio.start_server(server.handle_client, host, port)
+    print(f"Serviciul de inferență ascultă pe http://{host}:{port} (batch max {max_batch_size}, așteptare max {max_wait_ms} ms)")
+    try:
+        async with http_server:
+            await http_server.serve_forever()
+    finally:
+        batch_task.cancel()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serviciu HTTP local pentru modelul UnderMyAISkin, cu micro-batching.")
+    parser.add_argument('--model', default=MODEL_PATH, help="Calea către modelul .h5")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE, help="Numărul maxim de vectori per forward pass")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAXSIZE, help="Numărul maxim de vectori distincți păstrați în cache-ul LRU")
+    parser.add_argument('--backend', choices=('float', 'int8', 'ensemble'), default='float',
+                        help="Motorul de inferență (int8 = model cuantizat, ensemble = ansamblul de lângă .h5)")
+    parser.add_argument('--registry', default=REGISTRY_DIR, help="Registrul de modele; versiunea promovată are prioritate față de --model")
+    parser.add_argument('--no-registry', action='store_true', help="Folosește doar --model, fără registru")
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS, help="Timpul maxim de așteptare pentru umplerea unui batch")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        asyncio.run(serve(args.model, args.host, args.port, args.max_batch_size, args.max_wait_ms, args.cache_size,
+                          args.backend, None if args.no_registry else args.registry))
+    except KeyboardInterrupt:
+        print("\nServiciul a fost oprit.")
@@ -1,6 +1,6 @@
 import sys
+import time
 import numpy as np
-import tensorflow as tf
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, 
     QHBoxLayout, QGridLayout, QLabel, QCheckBox, 
@@ -8,7 +8,7 @@ from PyQt6.QtWidgets import (
     QLineEdit, QRadioButton
 )
 from PyQt6.QtGui import QIntValidator
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
 import os
 
 # Importam logica de baza de date si alertă
@@ -16,39 +16,112 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 try:
     from src.database_manager import initialize_database, record_case, check_for_epidemic_alert
+    from src.triage_common import MODEL_PATH, DIAGNOSES, RECOMMENDATIONS
+    from src.what_if import sensitivity, format_sensitivity
+    from src.metrics import registry, timed, instrument, start_metrics_server
 except ImportError:
     print("EROARE: Modulul src.database_manager nu a fost gasit.")
     print("Va rugam sa va asigurati ca ati creat fisierul src/database_manager.py")
     sys.exit(1)
 
 
-# --- Configuratii ---
-MODEL_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), 'neural_network', 'dermotriage_mlp_model.h5'))
-# Vom folosi numele bolilor de la clasa 1 la 6
-DIAGNOSES = {
-    1: "Psoriazis", 
-    2: "Dermatită seboreică", 
-    3: "Lichen plan", 
-    4: "Pityriasis rosea", 
-    5: "Dermatită cronică", 
-    6: "Pityriasis rubra pilaris"
-}
-
-# --- Recomandări Clinice (Text) ---
-RECOMMENDATIONS = {
-    1: "Necesită neapărat vizita la dermatolog. Această afecțiune necesită o schemă de tratament complexă.",
-    2: "Este nevoie de medicamente topice. Consultați medicul de familie pentru un tratament inițial.",
-    3: "Necesită neapărat vizita la dermatolog pentru confirmare și tratament sistemic.",
-    4: "Trece de la sine în 6-8 săptămâni. Monitorizați simptomele; consultați un medic doar dacă se agravează.",
-    5: "Este nevoie de medicamente. Evitați factorii iritanți și consultați un medic pentru prescripții de unguente.",
-    6: "Necesită neapărat vizita la dermatolog. Terapia este adesea complexă și de lungă durată."
-}
-
-# --- Scaler Parameters ---
-# Aceste valori sunt necesare pentru a scala 'Age' (A34) la fel ca în pre-procesare
-AGE_MIN = 1.0
-AGE_MAX = 90.0
-AGE_RANGE = AGE_MAX - AGE_MIN
+class DependencyLoader(QThread):
+    """Încarcă modelul AI și baza de date pe un fir separat, fără a bloca interfața."""
+    # (model sau None, mesaj de eroare, durata încărcării în secunde)
+    dependencies_ready = pyqtSignal(object, str, float)
+
+    def __init__(self, model_path, parent=None):
+        super().__init__(parent)
+        self.model_path = model_path
+
+    def run(self):
+        start = time.perf_counter()
+        model, error = None, ""
+        try:
+            model = self.load_model()
+        except Exception as e:
+            error = (f"Nu am putut încărca modelul MLP: {e}. Asigurați-vă că model.py a rulat și ca fisierul .h5 "
+                     f"exista la calea: {self.model_path}")
+
+        # Inițializare Bază de Date (o eroare aici - fișier blocat, cale greșită - este raportată ca și cea a modelului,
+        # altfel firul s-ar opri fără semnal și butonul de clasificare ar rămâne dezactivat fără niciun mesaj)
+        try:
+            initialize_database()
+        except Exception as e:
+            model = None
+            error = (error + "\n\n" if error else "") + f"Nu am putut inițializa baza de date: {e}"
+        self.dependencies_ready.emit(model, error, time.perf_counter() - start)
+
+    def load_model(self):
+        # Importurile grele (h5py, motorul de inferență) se fac aici, nu la pornirea ferestrei
+        from src.neural_network.prediction_cache import CachedPredictor
+        from src.neural_network.model_registry import REGISTRY_DIR
+        # Terminalele cu memorie puțină pot folosi modelul cuantizat: UNDERMYAISKIN_BACKEND=int8
+        # Modelul este versiunea promovată în registru (sau MODEL_PATH dacă registrul este gol);
+        # o promovare nouă este preluată în fundal, fără repornirea aplicației
+        model = CachedPredictor(self.model_path, backend=os.environ.get('UNDERMYAISKIN_BACKEND', 'float'),
+                                registry_dir=REGISTRY_DIR)
+        model.start_watcher()
+        return model
+
+
+class PredictionWorker(QThread):
+    """Execută inferența, înregistrarea cazului și verificarea alertelor în afara buclei Qt."""
+    # Vectorul de probabilități (6 clase), emis imediat după inferență
+    prediction_ready = pyqtSignal(object)
+    # (clasele cu focare active, vectorul de probabilități), emis după verificarea alertelor
+    alert_ready = pyqtSignal(object, object)
+    # Mesajul de eroare, dacă o etapă (inferență, baza de date) eșuează
+    prediction_failed = pyqtSignal(str)
+
+    def __init__(self, model, raw_vector, raw_symptoms_str, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.raw_vector = raw_vector
+        self.raw_symptoms_str = raw_symptoms_str
+
+    def run(self):
+        # O excepție nu trebuie să părăsească run(): ar fi pierdută (sau ar opri aplicația) fără niciun mesaj
+        try:
+            self.run_stages()
+        except Exception as e:
+            self.prediction_failed.emit(f"{type(e).__name__}: {e}")
+
+    def run_stages(self):
+        # 1. Executare Predicție (Inferență; vectorii deja văzuți sunt serviți din cache-ul LRU)
+        probabilities = self.model.predict_raw(self.raw_vector)[0]
+        self.prediction_ready.emit(probabilities)
+
+        # 2. Înregistrare Caz în Baza de Date (cel mai probabil diagnostic, clasele 1-6)
+        max_class = int(np.argmax(probabilities)) + 1
+        case_id = record_case(max_class, self.raw_symptoms_str)
+        print(f"Caz #{case_id} înregistrat: Clasa {max_class} ({DIAGNOSES[max_class]}), Prob: {probabilities[max_class - 1]:.2f}")
+
+        # 3. Verificare Alerte Epidemice (Logica Sănătății Publice)
+        focare_active = check_for_epidemic_alert()
+        self.alert_ready.emit(focare_active, probabilities)
+
+
+class WhatIfWorker(QThread):
+    """Analiza what-if pe un fir separat: loturile mari de variante nu blochează interfața."""
+    # Raportul de sensibilitate (vezi src/what_if.py)
+    report_ready = pyqtSignal(object)
+    what_if_failed = pyqtSignal(str)
+
+    def __init__(self, model, raw_vector, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.raw_vector = raw_vector
+
+    def run(self):
+        try:
+            # Variantele sunt sintetice: trec pe lângă cache-ul LRU, ca să nu scoată din el cazurile reale
+            # și să nu modifice statisticile hit/miss
+            with timed('what_if'):
+                report = sensitivity(self.model.predict_uncached, self.raw_vector)
+            self.report_ready.emit(report)
+        except Exception as e:
+            self.what_if_failed.emit(f"{type(e).__name__}: {e}")
 
 
 class UnderMyAISkinApp(QMainWindow):
@@ -57,7 +130,7 @@ class UnderMyAISkinApp(QMainWindow):
         self.setWindowTitle("UnderMyAISkin: Sistem AI de Pre-Diagnosticare Dermatologică")
         self.setGeometry(100, 100, 1000, 750)
 
-        # 1. Inițializare BD și Model
+        # 1. Inițializare atribute (modelul și BD se încarcă în fundal, după afișarea ferestrei)
         self.init_dependencies()
 
         # 2. Setare UI
@@ -71,21 +144,20 @@ class UnderMyAISkinApp(QMainWindow):
 
         self.main_layout.addWidget(self.input_group, 4) 
         self.main_layout.addWidget(self.output_group, 3) 
+
+        # 4. Pornire încărcare Model + BD pe firul de fundal
+        self.loader = DependencyLoader(MODEL_PATH, self)
+        self.loader.dependencies_ready.connect(self.on_dependencies_ready)
+        self.loader.start()
     
     def init_dependencies(self):
-        # Încărcare Model (și suprimarea mesajelor de la TensorFlow)
-        tf.get_logger().setLevel('ERROR')
-        print("Încărc Modelul AI...")
-        try:
-            self.model = tf.keras.models.load_model(MODEL_PATH)
-            print("Model AI încărcat cu succes.")
-        except Exception as e:
-            QMessageBox.critical(self, "Eroare AI", f"Nu am putut încărca modelul MLP: {e}. Asigurați-vă că model.py a rulat și ca fisierul .h5 exista la calea: {MODEL_PATH}")
-            self.model = None
-
-        # Inițializare Bază de Date
-        initialize_database()
-        print("Bază de date SQLite inițializată.")
+        # Modelul este setat de DependencyLoader când încărcarea din fundal se termină
+        print("Încărc Modelul AI în fundal...")
+        self.model = None
+        # Firul de predicție activ și ultima cerere primită cât timp acesta rula
+        self.prediction_worker = None
+        self.pending_request = None
+        self.what_if_worker = None
 
         # Atributele (A1-A10, A11=Family History, A34=Age)
         self.attribute_map = [
@@ -99,6 +171,23 @@ class UnderMyAISkinApp(QMainWindow):
         self.input_widgets = {}
         self.current_age = 35 
         
+    def on_dependencies_ready(self, model, error, elapsed):
+        """Primește modelul încărcat în fundal și activează butonul de clasificare."""
+        if model is None:
+            self.status_label.setText(f"Eroare la încărcarea modelului AI sau a bazei de date ({elapsed:.2f} s)")
+            self.status_label.setStyleSheet("color: red; font-weight: bold;")
+            QMessageBox.critical(self, "Eroare AI", error)
+            return
+        print("Bază de date SQLite inițializată.")
+
+        self.model = model
+        version = model.version or "implicit"
+        print(f"Model AI încărcat cu succes în {elapsed:.2f} s (versiune: {version}).")
+        self.status_label.setText(f"Model AI pregătit (versiune {version}, încărcat în {elapsed:.2f} s)")
+        self.status_label.setStyleSheet("color: green; font-weight: bold;")
+        self.predict_button.setEnabled(True)
+        self.what_if_button.setEnabled(True)
+
     def create_input_panel(self):
         """Creează panoul de input cu checkbox-uri și slider-e."""
         self.input_group = QGroupBox("1. Introducere Simptome Clinice (12 Atribute)")
@@ -161,7 +250,21 @@ class UnderMyAISkinApp(QMainWindow):
         self.predict_button = QPushButton("Clasificare cu UnderMyAISkin")
         self.predict_button.setStyleSheet("background-color: #4CAF50; color: white; padding: 15px; font-size: 16px; font-weight: bold; border-radius: 8px;")
         self.predict_button.clicked.connect(self.run_prediction)
+        # Butonul rămâne dezactivat până când modelul este încărcat
+        self.predict_button.setEnabled(False)
         layout.addWidget(self.predict_button, row, 0, 1, 3)
+
+        # Buton pentru analiza what-if (cum s-ar schimba diagnosticul dacă un singur simptom ar fi diferit)
+        self.what_if_button = QPushButton("Analiză What-If (sensibilitate)")
+        self.what_if_button.setStyleSheet("padding: 8px; font-size: 13px;")
+        self.what_if_button.clicked.connect(self.run_what_if)
+        self.what_if_button.setEnabled(False)
+        layout.addWidget(self.what_if_button, row + 1, 0, 1, 3)
+
+        # Indicator de stare pentru încărcarea modelului
+        self.status_label = QLabel("Se încarcă modelul AI...")
+        self.status_label.setStyleSheet("color: gray; font-style: italic;")
+        layout.addWidget(self.status_label, row + 2, 0, 1, 3)
         
         self.input_group.setLayout(layout)
 
@@ -194,6 +297,14 @@ class UnderMyAISkinApp(QMainWindow):
         self.recommendation_display.setStyleSheet("background-color: #f0f0f0;")
         layout.addWidget(self.recommendation_display)
 
+        # Analiza What-If
+        layout.addWidget(QLabel("\n--- Analiză What-If: atributele care schimbă cel mai mult diagnosticul ---"))
+        self.what_if_display = QTextEdit()
+        self.what_if_display.setReadOnly(True)
+        self.what_if_display.setFontPointSize(10)
+        self.what_if_display.setText("Apăsați «Analiză What-If» pentru pacientul curent.")
+        layout.addWidget(self.what_if_display)
+
         self.output_group.setLayout(layout)
 
     def update_age(self, text):
@@ -206,8 +317,8 @@ class UnderMyAISkinApp(QMainWindow):
         except ValueError:
             pass
         
-    def collect_input_vector(self):
-        """Colectează cele 12 atribute clinice de la utilizator."""
+    def collect_raw_vector(self):
+        """Colectează cele 12 atribute clinice brute (nescalate) de la utilizator."""
         input_vector = []
         symptoms_str = []
         
@@ -229,54 +340,104 @@ class UnderMyAISkinApp(QMainWindow):
             
             input_vector.append(value)
             symptoms_str.append(str(value))
-        
-        # --- SCALARE INPUT (CRITIC: Trebuie să folosească aceeași logică ca în pre-procesare) ---
-        input_array = np.array(input_vector).astype(np.float32)
-        
-        # A1-A10 (index 0-9): Scalare 0-3 -> 0-1 (împărțire la 3)
-        input_array[0:10] = input_array[0:10] / 3.0
-        
-        # A11 (index 10): Istoric Familial este deja 0 sau 1
-        
-        # A34 (index 11): Vârsta, Scalare Min-Max
-        if input_array[11] > 0:
-             input_array[11] = (input_array[11] - AGE_MIN) / AGE_RANGE
-        
-        
-        return input_array.reshape(1, -1), ",".join(symptoms_str)
+
+        return input_vector, ",".join(symptoms_str)
 
     def run_prediction(self):
-        """Execută clasificarea, înregistrează cazul și verifică alerte."""
+        """Colectează inputul și trimite cererea către firul de predicție (clicurile repetate sunt comasate)."""
         if not self.model:
             QMessageBox.warning(self, "Avertisment", "Modelul AI nu este încărcat.")
             return
 
-        # 1. Colectare și Pregătire Input
-        scaled_input, raw_symptoms_str = self.collect_input_vector()
+        # 1. Colectare Input (pe firul GUI, citește widget-urile; scalarea se face în predictor)
+        with timed('input_collection'):
+            raw_vector, raw_symptoms_str = self.collect_raw_vector()
 
-        # 2. Executare Predicție (Inferență)
-        probabilities = self.model.predict(scaled_input, verbose=0)[0] 
-        
-        # 3. Procesare Rezultate (TOATE CELE 6 CLASE)
+        # Dacă o cerere este deja în lucru, păstrăm doar ultimul input și îl rulăm după
+        if self.prediction_worker is not None and self.prediction_worker.isRunning():
+            self.pending_request = (raw_vector, raw_symptoms_str)
+            return
+
+        self.start_prediction_worker(raw_vector, raw_symptoms_str)
+
+    def run_what_if(self):
+        """Toate variantele cu un singur atribut schimbat, scorate într-un singur forward pass (fără înregistrare în BD)."""
+        if not self.model:
+            QMessageBox.warning(self, "Avertisment", "Modelul AI nu este încărcat.")
+            return
+        if self.what_if_worker is not None and self.what_if_worker.isRunning():
+            return
+
+        # Variantele se construiesc din vectorul brut al pacientului și sunt scalate toate odată în predictor
+        raw_vector, _ = self.collect_raw_vector()
+        self.what_if_button.setEnabled(False)
+        self.what_if_display.setText("Se calculează analiza what-if...")
+        self.what_if_worker = WhatIfWorker(self.model, raw_vector, self)
+        self.what_if_worker.report_ready.connect(self.on_what_if_ready)
+        self.what_if_worker.what_if_failed.connect(self.on_what_if_failed)
+        self.what_if_worker.finished.connect(lambda: self.what_if_button.setEnabled(True))
+        self.what_if_worker.start()
+
+    @instrument('ui_update')
+    def on_what_if_ready(self, report):
+        self.what_if_display.setText(format_sensitivity(report, self.attribute_map))
+
+    def on_what_if_failed(self, error):
+        print(f"EROARE la analiza what-if: {error}")
+        self.what_if_display.setText(f"Analiza what-if a eșuat: {error}")
+
+    def start_prediction_worker(self, raw_vector, raw_symptoms_str):
+        """Pornește etapele inferență -> înregistrare caz -> verificare alerte în fundal."""
+        self.prediction_worker = PredictionWorker(self.model, raw_vector, raw_symptoms_str, self)
+        self.prediction_worker.prediction_ready.connect(self.on_prediction_ready)
+        self.prediction_worker.alert_ready.connect(self.on_alert_ready)
+        self.prediction_worker.prediction_failed.connect(self.on_prediction_failed)
+        self.prediction_worker.finished.connect(self.on_prediction_finished)
+        self.prediction_worker.start()
+
+    def on_prediction_finished(self):
+        """La terminarea unei cereri, rulăm cererea comasată (dacă există)."""
+        # Metricile pe etape pot fi scrise într-un fișier text Prometheus după fiecare predicție
+        metrics_file = os.environ.get('UNDERMYAISKIN_METRICS_FILE')
+        if metrics_file:
+            registry.export_prometheus(metrics_file)
+
+        if self.pending_request is not None:
+            raw_vector, raw_symptoms_str = self.pending_request
+            self.pending_request = None
+            self.start_prediction_worker(raw_vector, raw_symptoms_str)
+
+    def on_prediction_failed(self, error):
+        """Afișează eroarea unei cereri; aplicația rămâne utilizabilă pentru cererile următoare."""
+        print(f"EROARE la clasificare: {error}")
+        QMessageBox.critical(self, "Eroare la clasificare",
+                             f"Clasificarea sau înregistrarea cazului a eșuat: {error}")
+
+    @instrument('ui_update')
+    def on_prediction_ready(self, probabilities):
+        """Afișează toate cele 6 clasificări imediat ce inferența s-a terminat."""
         # Obține indicii (clasele 0-5) sortate după probabilitate descrescător
-        # Luăm toate cele 6 indici ([:6])
         top_indices = np.argsort(probabilities)[::-1][:6] 
+
+        # Generare Output (TOATE CELE 6 CLASIFICĂRI)
+        output_text = "Probabilitate | Diagnostic\n"
+        output_text += "---------------------------------\n"
+        for rank, index in enumerate(top_indices):
+            class_code = index + 1
+            prob = probabilities[index] * 100
+            # Afisam toate cele 6, dar evidentiem primele 3
+            prefix = "⭐ " if rank < 1 else "   " 
+            output_text += f"{prefix} {prob:.2f}% | {DIAGNOSES[class_code]}\n"
         
-        # Obține cele mai probabile clase (1-6)
-        top_classes = top_indices + 1 
-        
-        # Obține cel mai probabil diagnostic (primul din lista sortată)
-        max_class_index = top_indices[0]
-        max_class = top_classes[0]
+        self.result_display.setText(output_text)
+
+    @instrument('ui_update')
+    def on_alert_ready(self, focare_active, probabilities):
+        """Actualizează statusul epidemic și recomandarea după înregistrarea cazului."""
+        max_class_index = int(np.argmax(probabilities))
+        max_class = max_class_index + 1
         max_prob = probabilities[max_class_index]
-        
-        # 4. Înregistrare Caz în Baza de Date
-        record_case(int(max_class), raw_symptoms_str)
-        print(f"Caz înregistrat: Clasa {max_class} ({DIAGNOSES[max_class]}), Prob: {max_prob:.2f}")
 
-        # 5. Verificare Alerte Epidemice (Logica Sănătății Publice)
-        focare_active = check_for_epidemic_alert()
-        
         is_epidemic = False
         if focare_active:
             self.alert_label.setStyleSheet("font-weight: bold; color: white; padding: 10px; border: 2px solid red; border-radius: 5px; background-color: #ff3333;")
@@ -286,19 +447,7 @@ class UnderMyAISkinApp(QMainWindow):
             self.alert_label.setStyleSheet("font-weight: bold; color: green; padding: 10px; border: 2px solid green; border-radius: 5px; background-color: #e6ffe6;")
             self.alert_label.setText("STATUS EPIDEMIC: Nu sunt focare active detectate. Urmați recomandarea.")
 
-        # 6. Generare Output (TOATE CELE 6 CLASIFICĂRI)
-        output_text = "Probabilitate | Diagnostic\n"
-        output_text += "---------------------------------\n"
-        for rank, index in enumerate(top_indices):
-            class_code = index + 1
-            prob = probabilities[index] * 100
-            # Afisam toate cele 6, dar evidentiem primele 3
-            prefix = "⭐ " if rank < 1 else "   " 
-            output_text += f"{prefix} {prob:.2f}% | {DIAGNOSES[class_code]}\n"
-        
-        self.result_display.setText(output_text)
-        
-        # 7. Generare Recomandare Finală
+        # Generare Recomandare Finală
         if is_epidemic:
             final_recommendation = (
                 f"*** ALERTA SUPRASCRIE DIAGNOSTICUL INDIVIDUAL ***\n"
@@ -326,6 +475,12 @@ if __name__ == "__main__":
         print("Va rugam sa va asigurati ca ati instalat PyQt6 si ca codul este complet.")
         sys.exit(1)
 
+    # Endpoint local opțional pentru metrici: UNDERMYAISKIN_METRICS_PORT=9108 -> http://127.0.0.1:9108/metrics
+    metrics_port = os.environ.get('UNDERMYAISKIN_METRICS_PORT')
+    if metrics_port:
+        start_metrics_server(int(metrics_port))
+        print(f"Metricile de latență sunt disponibile la http://127.0.0.1:{metrics_port}/metrics")
+
     window = UnderMyAISkinApp()
     window.show()
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,170 @@
+# Instrumentare ușoară a latenței pe etape (histograme glisante p50/p95/p99 + contoare), cu export Prometheus
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# Numărul de măsurători recente păstrate pe etapă (pentru percentile)
+WINDOW_SIZE = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC_PREFIX = 'undermyaiskin_stage_latency_seconds'
+
+
+class StageMetrics:
+    """Contoare totale + ultimele WINDOW_SIZE durate pentru o etapă.
+
+    Actualizările vin din mai multe fire (workeri QThread, serverul de inferență), iar `+=` nu este atomic,
+    deci contoarele sunt modificate și citite sub un lock per etapă.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.errors = 0
+        self.samples = deque(maxlen=WINDOW_SIZE)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.samples.append(seconds)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def read(self):
+        """(count, total_seconds, errors, durate recente) citite consistent."""
+        with self._lock:
+            return self.count, self.total_seconds, self.errors, tuple(self.samples)
+
+    def quantiles(self, samples=None):
+        samples = tuple(self.samples) if samples is None else samples
+        if not samples:
+            return {q: 0.0 for q in QUANTILES}
+        values = np.quantile(np.fromiter(samples, dtype=np.float64), QUANTILES)
+        return dict(zip(QUANTILES, values.tolist()))
+
+
+class MetricsRegistry:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        metrics = self._stages.get(name)
+        if metrics is None:
+            with self._lock:
+                metrics = self._stages.setdefault(name, StageMetrics())
+        return metrics
+
+    @contextmanager
+    def timed(self, name):
+        """Măsoară durata blocului `with` (nu face nimic dacă instrumentarea este oprită)."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.stage(name).record_error()
+            raise
+        finally:
+            self.stage(name).observe(time.perf_counter() - start)
+
+    def instrument(self, name):
+        """Decorator: măsoară fiecare apel al funcției ca etapa `name`."""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with self.timed(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Starea curentă: {etapă: {count, sum_s, errors, p50, p95, p99}}."""
+        with self._lock:
+            stages = dict(self._stages)
+        result = {}
+        for name, metrics in sorted(stages.items()):
+            count, total_seconds, errors, samples = metrics.read()
+            q = metrics.quantiles(samples)
+            result[name] = {
+                'count': count,
+                'sum_s': total_seconds,
+                'errors': errors,
+                'p50_s': q[0.5], 'p95_s': q[0.95], 'p99_s': q[0.99],
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+
+    def to_prometheus(self):
+        """Formatul text Prometheus (summary cu quantile, _sum, _count + contor de erori)."""
+        lines = [
+            f"# HELP {METRIC_PREFIX} Latenta pe etape a caii de predictie UnderMyAISkin.",
+            f"# TYPE {METRIC_PREFIX} summary",
+        ]
+        snapshot = self.snapshot()
+        for name, m in snapshot.items():
+            for q, key in zip(QUANTILES, ('p50_s', 'p95_s', 'p99_s')):
+                lines.append(f'{METRIC_PREFIX}{{stage="{name}",quantile="{q}"}} {m[key]:.9f}')
+            lines.append(f'{METRIC_PREFIX}_sum{{stage="{name}"}} {m["sum_s"]:.9f}')
+            lines.append(f'{METRIC_PREFIX}_count{{stage="{name}"}} {m["count"]}')
+        lines.append("# HELP undermyaiskin_stage_errors_total Numarul de apeluri terminate cu exceptie.")
+        lines.append("# TYPE undermyaiskin_stage_errors_total counter")
+        for name, m in snapshot.items():
+            lines.append(f'undermyaiskin_stage_errors_total{{stage="{name}"}} {m["errors"]}')
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self, path):
+        """Scrie metricile într-un fișier text (ex. pentru node_exporter textfile collector)."""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+# Registrul global; pornit implicit, se poate opri cu UNDERMYAISKIN_METRICS=0 sau set_enabled(False)
+registry = MetricsRegistry(enabled=os.environ.get('UNDERMYAISKIN_METRICS', '1') != '0')
+timed = registry.timed
+instrument = registry.instrument
+
+
+def set_enabled(enabled):
+    registry.enabled = bool(enabled)
+
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """Server HTTP local (fir daemon) care expune GET /metrics."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.to_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
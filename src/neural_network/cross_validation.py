@@ -0,0 +1,127 @@
+# Validare încrucișată stratificată (k-fold / repeated k-fold), cu fold-urile antrenate în paralel
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import StratifiedKFold, RepeatedStratifiedKFold
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.preprocessing.transform import INPUT_FEATURES, FeatureTransform
+from src.neural_network.sweep import CONFIG_DIR, limit_tf_threads
+from src.triage_common import DIAGNOSES
+
+CLEANED_DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'processed', 'dermatology_12features_cleaned.csv'))
+
+# Datele brute (X, y) din fiecare proces worker, primite o singură dată în initializer
+_worker_data = None
+
+
+def load_cleaned_data(path=CLEANED_DATA_PATH):
+    """X brut (N, 12) și clasele 0-5 din setul curățat."""
+    df = pd.read_csv(path)
+    return df[INPUT_FEATURES].to_numpy(dtype=np.float64), df['Class'].to_numpy() - 1
+
+
+def _init_worker(X, y):
+    global _worker_data
+    limit_tf_threads()
+    _worker_data = (X, y)
+
+
+def _run_fold(fold_id, train_idx, test_idx, config, seed):
+    import tensorflow as tf
+    from src.neural_network.model import create_mlp_model
+
+    X, y = _worker_data
+    start = time.perf_counter()
+    tf.keras.utils.set_random_seed(seed + fold_id)
+
+    # Scalerul este învățat doar pe partea de antrenare a fold-ului (fără data leakage)
+    feature_transform = FeatureTransform.fit(X[train_idx])
+    X_train = feature_transform.transform(X[train_idx])
+    X_test = feature_transform.transform(X[test_idx])
+    y_train = tf.keras.utils.to_categorical(y[train_idx], config['output_dim'])
+
+    model = create_mlp_model(config)
+    model.fit(X_train, y_train, epochs=config['training_epochs'], batch_size=config['batch_size'], verbose=0)
+    y_pred = model.predict(X_test, verbose=0).argmax(axis=1)
+
+    return {
+        'fold': fold_id,
+        'accuracy': float((y_pred == y[test_idx]).mean()),
+        'y_true': y[test_idx],
+        'y_pred': y_pred,
+        'wall_time_s': time.perf_counter() - start,
+    }
+
+
+def cross_validate(config, n_splits=5, n_repeats=1, seed=42, workers=None, data_path=CLEANED_DATA_PATH):
+    """Rulează toate fold-urile în paralel și agregă acuratețea și matricea de confuzie."""
+    X, y = load_cleaned_data(data_path)
+    if n_repeats > 1:
+        splitter = RepeatedStratifiedKFold(n_splits=n_splits, n_repeats=n_repeats, random_state=seed)
+    else:
+        splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    folds = list(splitter.split(X, y))
+
+    n_classes = config['output_dim']
+    confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+    fold_results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=mp.get_context('spawn'),
+                             initializer=_init_worker, initargs=(X, y)) as pool:
+        futures = [pool.submit(_run_fold, i, train_idx, test_idx, config, seed) for i, (train_idx, test_idx) in enumerate(folds)]
+        for future in as_completed(futures):
+            result = future.result()
+            # Matricea de confuzie: rânduri = clasa reală, coloane = clasa prezisă
+            np.add.at(confusion, (result['y_true'], result['y_pred']), 1)
+            fold_results.append(result)
+            print(f"  Fold {result['fold'] + 1}/{len(folds)}: acuratețe {result['accuracy'] * 100:.2f}% ({result['wall_time_s']:.1f} s)")
+
+    accuracies = np.array([r['accuracy'] for r in sorted(fold_results, key=lambda r: r['fold'])])
+    return {
+        'n_splits': n_splits,
+        'n_repeats': n_repeats,
+        'fold_accuracies': accuracies.tolist(),
+        'mean_accuracy': float(accuracies.mean()),
+        'std_accuracy': float(accuracies.std(ddof=1)) if len(accuracies) > 1 else 0.0,
+        'confusion_matrix': confusion.tolist(),
+        'per_class_recall': (confusion.diagonal() / np.maximum(confusion.sum(axis=1), 1)).tolist(),
+        'total_time_s': time.perf_counter() - start,
+    }
+
+
+def print_report(report):
+    print(f"\nAcuratețe: {report['mean_accuracy'] * 100:.2f}% ± {report['std_accuracy'] * 100:.2f}% "
+          f"({report['n_splits']} fold-uri x {report['n_repeats']} repetări)")
+    print("\nMatrice de confuzie (rânduri = clasa reală, coloane = clasa prezisă):")
+    print("      " + " ".join(f"{c:>5}" for c in sorted(DIAGNOSES)))
+    for class_code, row, recall in zip(sorted(DIAGNOSES), report['confusion_matrix'], report['per_class_recall']):
+        print(f"{class_code:>5} " + " ".join(f"{n:>5}" for n in row) + f"   recall {recall * 100:6.2f}% | {DIAGNOSES[class_code]}")
+    print(f"\nTimp total: {report['total_time_s']:.1f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validare încrucișată stratificată pentru MLP-ul de triaj.")
+    parser.add_argument('--folds', type=int, default=5, help="Numărul de fold-uri (k)")
+    parser.add_argument('--repeats', type=int, default=1, help="Numărul de repetări (repeated k-fold)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None, help="Numărul de procese (implicit: numărul de nuclee)")
+    parser.add_argument('--output', default=None, help="Fișier JSON pentru raport")
+    args = parser.parse_args()
+
+    with open(os.path.join(CONFIG_DIR, 'model_params.json'), 'r') as f:
+        config = json.load(f)
+
+    report = cross_validate(config, args.folds, args.repeats, args.seed, args.workers)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"Raportul a fost salvat în: {args.output}")
@@ -0,0 +1,190 @@
+# Ansamblu de MLP-uri (semințe sau fold-uri diferite) servit ca un singur forward pass pe tensori stivuiți
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing as mp
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.neural_network.numpy_engine import MODEL_H5_PATH, ACTIVATIONS, NumpyMLP
+from src.neural_network.sweep import CONFIG_DIR, limit_tf_threads
+from src.preprocessing.dataset_cache import DATA_DIR, CACHE_DIR, load_datasets
+
+# Seturile de date din fiecare proces worker (încărcate o singură dată, în initializer)
+_worker_data = None
+
+
+def ensemble_path_for(h5_path):
+    """Ansamblul se află lângă fișierul .h5: <nume>.ensemble.npz."""
+    return os.path.splitext(h5_path)[0] + '.ensemble.npz'
+
+
+class EnsembleMLP:
+    """N MLP-uri cu aceeași arhitectură, cu ponderile stivuite: stratul i are W (N, in, out) și b (N, out).
+
+    Un singur apel calculează toți membrii pentru tot batch-ul (matmul cu broadcasting pe axa membrilor),
+    în loc de N apeluri separate. `predict` întoarce media probabilităților, cu aceeași interfață ca NumpyMLP.
+    """
+
+    def __init__(self, weights, biases, activations):
+        self.weights = weights
+        self.biases = [b[:, None, :] for b in biases]
+        self.activations = [ACTIVATIONS[name] for name in activations]
+        self.activation_names = list(activations)
+        self.n_members = weights[0].shape[0]
+        self.input_dim = weights[0].shape[1]
+        self.output_dim = weights[-1].shape[2]
+
+    @classmethod
+    def from_members(cls, members):
+        """Stivuiește motoare NumpyMLP (sau liste de ponderi Keras) cu aceeași arhitectură."""
+        members = [m if isinstance(m, NumpyMLP) else NumpyMLP(m[0][0::2], m[0][1::2], m[1]) for m in members]
+        activations = members[0].activation_names
+        if any(m.activation_names != activations or [W.shape for W in m.weights] != [W.shape for W in members[0].weights]
+               for m in members):
+            raise ValueError("Toți membrii ansamblului trebuie să aibă aceeași arhitectură.")
+        weights = [np.stack([m.weights[i] for m in members]).astype(np.float32) for i in range(len(activations))]
+        biases = [np.stack([m.biases[i] for m in members]).astype(np.float32) for i in range(len(activations))]
+        return cls(weights, biases, activations)
+
+    @classmethod
+    def from_npz(cls, npz_path):
+        with np.load(npz_path, allow_pickle=False) as data:
+            activations = [str(a) for a in data['activations']]
+            weights = [data[f'W{i}'] for i in range(len(activations))]
+            biases = [data[f'b{i}'] for i in range(len(activations))]
+        return cls(weights, biases, activations)
+
+    def save(self, npz_path, members_info=None):
+        arrays = {}
+        for i, (W, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f'W{i}'] = W
+            arrays[f'b{i}'] = b[:, 0, :]
+        np.savez(npz_path,
+                 activations=np.array(self.activation_names),
+                 members=np.array(json.dumps(members_info or [])),
+                 **arrays)
+        return npz_path
+
+    def predict_members(self, X):
+        """Probabilitățile fiecărui membru: (N membri, batch, output_dim)."""
+        h = np.asarray(X, dtype=np.float32)
+        if h.ndim == 1:
+            h = h.reshape(1, -1)
+        # (batch, in) @ (N, in, out) -> (N, batch, out); straturile următoare: (N, batch, in) @ (N, in, out)
+        for W, b, activation in zip(self.weights, self.biases, self.activations):
+            h = activation(np.matmul(h, W) + b)
+        return h
+
+    def predict(self, X):
+        """Media probabilităților membrilor (N, output_dim)."""
+        return self.predict_members(X).mean(axis=0)
+
+    def predict_with_uncertainty(self, X):
+        """(media probabilităților, deviația standard între membri, dezacordul top-1).
+
+        Dezacordul este fracțiunea membrilor a căror clasă top-1 diferă de clasa top-1 a ansamblului.
+        """
+        member_probs = self.predict_members(X)
+        mean = member_probs.mean(axis=0)
+        ensemble_class = mean.argmax(axis=1)
+        disagreement = (member_probs.argmax(axis=2) != ensemble_class[None, :]).mean(axis=0)
+        return mean, member_probs.std(axis=0), disagreement
+
+
+def load_ensemble_engine(h5_path=MODEL_H5_PATH):
+    """Încarcă ansamblul de lângă .h5 (creat cu `python src/neural_network/ensemble.py`)."""
+    npz_path = ensemble_path_for(h5_path)
+    if not os.path.exists(npz_path):
+        raise FileNotFoundError(f"Ansamblul nu există: {npz_path}. Rulați src/neural_network/ensemble.py pentru a-l antrena.")
+    return EnsembleMLP.from_npz(npz_path)
+
+
+def _init_worker(data_dir, cache_dir):
+    global _worker_data
+    limit_tf_threads()
+    _worker_data = load_datasets(data_dir, cache_dir)
+
+
+def _train_member(member_id, config, seed, train_idx):
+    import tensorflow as tf
+    from src.neural_network.model import create_mlp_model
+
+    data = _worker_data
+    start = time.perf_counter()
+    tf.keras.utils.set_random_seed(seed)
+    model = create_mlp_model(config)
+    model.fit(data['X_train'][train_idx], data['y_train'][train_idx],
+              epochs=config['training_epochs'], batch_size=config['batch_size'], verbose=0)
+    _, val_accuracy = model.evaluate(data['X_val'], data['y_val'], verbose=0)
+
+    activations = [layer['activation'] for layer in config['layer_structure']] + ['softmax']
+    return {
+        'member': member_id,
+        'seed': seed,
+        'n_train': int(len(train_idx)),
+        'val_accuracy': float(val_accuracy),
+        'wall_time_s': time.perf_counter() - start,
+        'weights': ([np.asarray(w) for w in model.get_weights()], activations),
+    }
+
+
+def train_ensemble(config, n_members=5, mode='seeds', seed=42, workers=None, data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+    """Antrenează membrii în paralel și îi stivuiește într-un EnsembleMLP.
+
+    mode='seeds': toți membrii pe tot X_train, cu inițializări diferite;
+    mode='folds': membrul k este antrenat fără fold-ul k al unei împărțiri stratificate a lui X_train.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    datasets = load_datasets(data_dir, cache_dir)
+    n_train = len(datasets['X_train'])
+    if mode == 'folds':
+        splitter = StratifiedKFold(n_splits=n_members, shuffle=True, random_state=seed)
+        train_indices = [train_idx for train_idx, _ in splitter.split(np.zeros(n_train), datasets['y_train'].argmax(axis=1))]
+    elif mode == 'seeds':
+        train_indices = [np.arange(n_train)] * n_members
+    else:
+        raise ValueError(f"Mod necunoscut: {mode} (valori posibile: seeds, folds)")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=mp.get_context('spawn'),
+                             initializer=_init_worker, initargs=(data_dir, cache_dir)) as pool:
+        futures = [pool.submit(_train_member, k, config, seed + k, train_idx) for k, train_idx in enumerate(train_indices)]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"  Membrul {result['member'] + 1}/{n_members}: val {result['val_accuracy'] * 100:.2f}% ({result['wall_time_s']:.1f} s)")
+
+    results.sort(key=lambda r: r['member'])
+    ensemble = EnsembleMLP.from_members([r.pop('weights') for r in results])
+    return ensemble, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Antrenează un ansamblu de MLP-uri și îl salvează ca tensori stivuiți.")
+    parser.add_argument('--members', type=int, default=5, help="Numărul de modele din ansamblu")
+    parser.add_argument('--mode', choices=('seeds', 'folds'), default='seeds', help="Semințe diferite sau fold-uri diferite din X_train")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None, help="Numărul de procese (implicit: numărul de nuclee)")
+    parser.add_argument('--output', default=ensemble_path_for(MODEL_H5_PATH), help="Fișierul .ensemble.npz")
+    args = parser.parse_args()
+
+    with open(os.path.join(CONFIG_DIR, 'model_params.json'), 'r') as f:
+        config = json.load(f)
+
+    ensemble, members = train_ensemble(config, args.members, args.mode, args.seed, args.workers)
+    ensemble.save(args.output, members)
+    print(f"Ansamblul ({ensemble.n_members} membri) a fost salvat în: {args.output}")
+
+    # Evaluare pe setul de test: ansamblul vs. fiecare membru
+    datasets = load_datasets(DATA_DIR, CACHE_DIR)
+    y_true = datasets['y_test'].argmax(axis=1)
+    mean, _, disagreement = ensemble.predict_with_uncertainty(datasets['X_test'])
+    member_accuracy = (ensemble.predict_members(datasets['X_test']).argmax(axis=2) == y_true).mean(axis=1)
+    print(f"Acuratețe test: ansamblu {(mean.argmax(axis=1) == y_true).mean() * 100:.2f}% | "
+          f"membri {member_accuracy.mean() * 100:.2f}% ± {member_accuracy.std() * 100:.2f}% | "
+          f"dezacord mediu {disagreement.mean() * 100:.1f}%")
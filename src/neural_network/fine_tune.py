@@ -0,0 +1,147 @@
+# Fine-tuning incremental din cazurile înregistrate: citire pe bucăți din SQLite, pornind de la ponderile .h5 curente
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src import database_manager
+from src.neural_network.numpy_engine import MODEL_H5_PATH, file_sha256
+from src.preprocessing.dataset_cache import DATA_DIR, CACHE_DIR, load_datasets
+from src.preprocessing.transform import TRANSFORM_PATH, FeatureTransform
+
+DEFAULT_CHUNK_SIZE = 1024
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_MAX_STEPS = 200
+# Rată de învățare mică: ajustăm modelul existent, nu îl reantrenăm
+DEFAULT_LEARNING_RATE = 1e-4
+
+
+def case_batches(feature_transform, after_seq=0, chunk_size=DEFAULT_CHUNK_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 use_predicted=False, n_classes=6):
+    """Generator de mini-batch-uri (X scalat, y one-hot, poziția ultimului caz din batch) din baza de date.
+
+    Doar o bucată de `chunk_size` cazuri este în memorie la un moment dat; scalarea se face cu
+    transformarea salvată la pre-procesare, ca la inferență.
+    """
+    for seqs, labels, symptoms in database_manager.iter_labelled_cases(after_seq, chunk_size, use_predicted):
+        X = feature_transform.transform(symptoms)
+        y = np.eye(n_classes, dtype=np.float32)[labels - 1]
+        for start in range(0, len(seqs), batch_size):
+            end = start + batch_size
+            yield X[start:end], y[start:end], int(seqs[start:end][-1])
+
+
+def default_output_path(h5_path):
+    """Fișier nou lângă modelul de pornire: <nume>.finetune-<dată-oră>.h5."""
+    return f"{os.path.splitext(h5_path)[0]}.finetune-{datetime.now().strftime('%Y%m%d-%H%M%S')}.h5"
+
+
+def fine_tune(h5_path=MODEL_H5_PATH, output_path=None, chunk_size=DEFAULT_CHUNK_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+              max_steps=DEFAULT_MAX_STEPS, learning_rate=DEFAULT_LEARNING_RATE, replay=DEFAULT_BATCH_SIZE // 2,
+              use_predicted=False, seed=42):
+    """Continuă antrenarea modelului .h5 pe cazurile etichetate după watermark, cel mult `max_steps` pași.
+
+    Fiecare batch de cazuri noi este completat cu `replay` exemple din X_train (setul UCI), ca modelul să
+    nu uite distribuția originală. Watermark-ul este ordinea confirmărilor (nu id-ul cazului), deci și un caz
+    vechi confirmat după o rulare este folosit la rularea următoare; cu use_predicted=True este id-ul.
+    Watermark-ul avansează doar până la ultimul caz folosit efectiv, deci cazurile rămase după max_steps
+    sunt procesate la rularea următoare.
+
+    Modelul ajustat este salvat într-un fișier nou și înregistrat în registrul de modele, cu acuratețea
+    înainte/după ca metrici; intră în producție doar după promovarea explicită a versiunii.
+    """
+    import tensorflow as tf
+    from src.neural_network.model_registry import register_model
+    from src.neural_network.numpy_engine import export_weights
+    from src.neural_network.quantization import export_quantized
+
+    output_path = output_path or default_output_path(h5_path)
+    # Suprascrierea modelului servit ar fi preluată imediat de CachedPredictor, fără promovare
+    if os.path.abspath(output_path) == os.path.abspath(h5_path):
+        raise ValueError(f"Modelul ajustat nu poate suprascrie modelul de pornire ({h5_path}); alegeți alt --output.")
+    database_manager.initialize_database()
+    watermark = database_manager.fine_tune_watermark(use_predicted)
+    feature_transform = FeatureTransform.load(TRANSFORM_PATH)
+
+    tf.keras.utils.set_random_seed(seed)
+    rng = np.random.default_rng(seed)
+    datasets = load_datasets(DATA_DIR, CACHE_DIR)
+    X_replay, y_replay = datasets['X_train'], datasets['y_train']
+    X_test, y_test = datasets['X_test'], datasets['y_test']
+
+    # Pornire din ponderile curente (warm start), cu un optimizator nou cu rată de învățare mică
+    model = tf.keras.models.load_model(h5_path)
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
+                  loss='categorical_crossentropy', metrics=['accuracy'])
+    _, accuracy_before = model.evaluate(X_test, y_test, verbose=0)
+
+    steps, n_cases, last_seq = 0, 0, watermark
+    start = time.perf_counter()
+    for X, y, batch_last_seq in case_batches(feature_transform, watermark, chunk_size, batch_size, use_predicted):
+        if steps >= max_steps:
+            break
+        if replay:
+            idx = rng.integers(0, len(X_replay), replay)
+            X, y = np.concatenate([X, X_replay[idx]]), np.concatenate([y, y_replay[idx]])
+        model.train_on_batch(X, y)
+        steps += 1
+        n_cases += len(X) - replay
+        last_seq = batch_last_seq
+
+    if steps == 0:
+        print(f"Nu există cazuri etichetate noi după watermark-ul {watermark}; modelul nu a fost modificat.")
+        return None
+
+    _, accuracy_after = model.evaluate(X_test, y_test, verbose=0)
+    model.save(output_path)
+    # Aceleași exporturi ca la antrenare, ca pachetul din registru să servească și backend-urile NumPy/int8
+    export_weights(output_path)
+    export_quantized(output_path, X_calibration=X_replay)
+    database_manager.record_fine_tune_run(output_path, file_sha256(output_path), watermark + 1, last_seq, n_cases, steps,
+                                          use_predicted)
+    source = database_manager.label_source(use_predicted)
+    version = register_model(output_path, TRANSFORM_PATH,
+                             metrics={'test_accuracy': float(accuracy_after), 'test_accuracy_before': float(accuracy_before),
+                                      'fine_tune_cases': n_cases, 'fine_tune_steps': steps},
+                             notes=f"fine-tuning din {os.path.basename(h5_path)} ({source} {watermark + 1}-{last_seq})")
+
+    report = {
+        'cases': n_cases,
+        'steps': steps,
+        'label_source': source,
+        'first_seq': watermark + 1,
+        'last_seq': last_seq,
+        'test_accuracy_before': float(accuracy_before),
+        'test_accuracy_after': float(accuracy_after),
+        'wall_time_s': time.perf_counter() - start,
+        'output_path': output_path,
+        'version': version,
+    }
+    print(f"Fine-tuning: {n_cases} cazuri noi ({report['label_source']} {watermark + 1}-{last_seq}), {steps} pași în {report['wall_time_s']:.1f} s")
+    print(f"Acuratețe pe setul de test UCI: {accuracy_before * 100:.2f}% -> {accuracy_after * 100:.2f}%")
+    print(f"Modelul a fost salvat în: {output_path} și înregistrat ca versiunea {version}. "
+          f"Activare: python src/neural_network/model_registry.py promote {version}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fine-tuning incremental al modelului pe cazurile noi din baza de date.")
+    parser.add_argument('--db', default=None, help="Baza de date (implicit: baza de date a aplicației)")
+    parser.add_argument('--model', default=MODEL_H5_PATH, help="Modelul .h5 de la care pornește antrenarea")
+    parser.add_argument('--output', default=None, help="Unde se salvează modelul ajustat (implicit: <model>.finetune-<dată-oră>.h5)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Cazuri citite din baza de date odată")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--max-steps', type=int, default=DEFAULT_MAX_STEPS, help="Numărul maxim de pași de optimizare per rulare")
+    parser.add_argument('--learning-rate', type=float, default=DEFAULT_LEARNING_RATE)
+    parser.add_argument('--replay', type=int, default=DEFAULT_BATCH_SIZE // 2, help="Exemple din X_train adăugate la fiecare batch (0 = fără)")
+    parser.add_argument('--use-predicted', action='store_true',
+                        help="Folosește diagnosticul prezis (diagnosis_class) ca etichetă, nu doar cazurile confirmate")
+    args = parser.parse_args()
+
+    if args.db:
+        database_manager.configure_database(args.db)
+    fine_tune(args.model, args.output, args.chunk_size, args.batch_size, args.max_steps, args.learning_rate,
+              args.replay, args.use_predicted)
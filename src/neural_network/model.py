@@ -4,7 +4,12 @@ import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Dense
 import os 
+import sys
 import json # Import NOU: necesar pentru lucrul cu fisierul de configurare JSON
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.preprocessing.dataset_cache import load_datasets
 
 # Definire cai catre seturile de date preprocesate din preprocessing_script.py
 def load_processed_data():
@@ -12,14 +17,11 @@ def load_processed_data():
     data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
     
     # Incărcam datele preprocesate din Etapa 3
-    X_train = np.loadtxt(os.path.join(data_dir, 'train', 'X_train.csv'), delimiter=",")
-    y_train = np.loadtxt(os.path.join(data_dir, 'train', 'y_train.csv'), delimiter=",")
-    X_val = np.loadtxt(os.path.join(data_dir, 'validation', 'X_val.csv'), delimiter=",")
-    y_val = np.loadtxt(os.path.join(data_dir, 'validation', 'y_val.csv'), delimiter=",")
-    X_test = np.loadtxt(os.path.join(data_dir, 'test', 'X_test.csv'), delimiter=",")
-    y_test = np.loadtxt(os.path.join(data_dir, 'test', 'y_test.csv'), delimiter=",")
+    # Din cache-ul binar memory-mapped (data/cache) dacă este valid, altfel din CSV (cache-ul se reconstruiește)
+    datasets = load_datasets(data_dir, os.path.join(data_dir, 'cache'))
     
-    return X_train, y_train, X_val, y_val, X_test, y_test
+    return (datasets['X_train'], datasets['y_train'], datasets['X_val'], datasets['y_val'],
+            datasets['X_test'], datasets['y_test'])
 
 def load_model_config():
     # Definim calea catre fisierul de configurare
@@ -59,14 +61,64 @@ def create_mlp_model(config):
     # Optimizator: Adam este standard si eficient 
     # Loss: Categorical Crossentropy este necesară pentru etichetele One-Hot
     # Metrica: Vrem să urmărim acuratețea datelor generate
+    # jit_compile (XLA) se activeaza din sectiunea 'training' a configurarii
     model.compile(optimizer='adam',
                   loss='categorical_crossentropy',
-                  metrics=['accuracy'])
+                  metrics=['accuracy'],
+                  jit_compile=config.get('training', {}).get('jit_compile', False))
     
     return model
 
     # Categorical Crossentropy este o matrice utilizata pentru clasificarea multiclase eficienta
 
+def make_dataset(X, y, batch_size, shuffle=False, shuffle_buffer=1024, seed=None):
+    # Pipeline tf.data: datele stau in memorie (cache), sunt amestecate la fiecare epoca si pregatite in avans (prefetch)
+    dataset = tf.data.Dataset.from_tensor_slices((np.asarray(X, dtype=np.float32), np.asarray(y, dtype=np.float32))).cache()
+    if shuffle:
+        dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+class EpochTimer(tf.keras.callbacks.Callback):
+    """Afiseaza durata fiecarei epoci si numarul de exemple procesate pe secunda."""
+
+    def __init__(self, n_samples):
+        super().__init__()
+        self.n_samples = n_samples
+        self.epoch_times = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self._start
+        self.epoch_times.append(elapsed)
+        logs = logs or {}
+        print(f"Epoca {epoch + 1}: {elapsed:.3f} s, {self.n_samples / elapsed:,.0f} exemple/s, "
+              f"loss {logs.get('loss', float('nan')):.4f}, val_loss {logs.get('val_loss', float('nan')):.4f}")
+
+def build_training_callbacks(config, n_samples):
+    # Callback-urile sunt controlate din sectiunea 'training' a fisierului model_params.json
+    training = config.get('training', {})
+    callbacks = [EpochTimer(n_samples)]
+
+    early_stopping = training.get('early_stopping', {})
+    if early_stopping.get('enabled', False):
+        # Oprim antrenarea cand val_loss nu se mai imbunatateste
+        callbacks.append(tf.keras.callbacks.EarlyStopping(
+            monitor='val_loss',
+            patience=early_stopping.get('patience', 10),
+            min_delta=early_stopping.get('min_delta', 0.0),
+            restore_best_weights=early_stopping.get('restore_best_weights', True)))
+
+    checkpoint = training.get('checkpoint', {})
+    if checkpoint.get('enabled', False):
+        # BackupAndRestore salveaza starea la fiecare epoca; daca rularea este intrerupta,
+        # urmatoarea rulare continua de la ultima epoca salvata (backup-ul se sterge la final)
+        backup_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), checkpoint.get('dir', 'checkpoints'), config['model_name']))
+        callbacks.append(tf.keras.callbacks.BackupAndRestore(backup_dir))
+
+    return callbacks
+
 def train_and_save_model():
     X_train, y_train, X_val, y_val, X_test, y_test = load_processed_data()
     config = load_model_config() # Citire configurare JSON
@@ -82,13 +134,30 @@ def train_and_save_model():
 
     # 2. Antrenarea Modelului
     print("\n--- Începe Antrenarea Modelului ---")
-    history = model.fit(
-        X_train, y_train,
-        epochs=config['training_epochs'], # Numar de epoci citit din JSON
-        batch_size=config['batch_size'], # Dimensiunea batch-ului citita din JSON
-        validation_data=(X_val, y_val),
-        verbose=1
-    )
+    training = config.get('training', {})
+    callbacks = build_training_callbacks(config, len(X_train))
+    if training.get('use_tf_data', False):
+        # Pipeline tf.data (amestecare + prefetch); batch-ul este aplicat in dataset
+        train_data = make_dataset(X_train, y_train, config['batch_size'], shuffle=True,
+                                  shuffle_buffer=training.get('shuffle_buffer', 1024), seed=training.get('seed'))
+        history = model.fit(
+            train_data,
+            epochs=config['training_epochs'], # Numar de epoci citit din JSON
+            validation_data=make_dataset(X_val, y_val, config['batch_size']),
+            callbacks=callbacks,
+            verbose=training.get('verbose', 0)
+        )
+    else:
+        history = model.fit(
+            X_train, y_train,
+            epochs=config['training_epochs'], # Numar de epoci citit din JSON
+            batch_size=config['batch_size'], # Dimensiunea batch-ului citita din JSON
+            validation_data=(X_val, y_val),
+            callbacks=callbacks,
+            verbose=training.get('verbose', 1)
+        )
+    print(f"Antrenare incheiata dupa {len(history.history['loss'])} epoci "
+          f"(timp total pe epoci: {sum(callbacks[0].epoch_times):.2f} s)")
 
     # 3. Evaluare Finală pe Setul de Test
     loss, accuracy = model.evaluate(X_test, y_test, verbose=0)
@@ -103,6 +172,22 @@ def train_and_save_model():
     model.save(model_save_path)
     print(f"\nModelul a fost salvat cu succes ca {model_save_path}")
 
+    # 5. Export pentru inferență fără TensorFlow: ponderi float (.npz) și model cuantizat int8 (.int8.npz),
+    # calibrat pe X_train
+    from src.neural_network.numpy_engine import export_weights
+    from src.neural_network.quantization import export_quantized, quantization_report, print_report
+    export_weights(model_save_path)
+    export_quantized(model_save_path, X_calibration=X_train)
+    print_report(quantization_report(model_save_path, X_test, y_test, measure_memory=False))
+
+    # 6. Înregistrare în registrul de modele (promovarea rămâne un pas separat, după verificare)
+    from src.neural_network.model_registry import register_model
+    version = register_model(model_save_path, metrics={'test_loss': float(loss), 'test_accuracy': float(accuracy),
+                                                       'epochs': len(history.history['loss'])},
+                             notes=config['model_name'])
+    print(f"Modelul a fost înregistrat ca versiunea {version}. "
+          f"Activare: python src/neural_network/model_registry.py promote {version}")
+
     return model_save_path
 
 if __name__ == "__main__":
@@ -0,0 +1,232 @@
+# Registru de modele versionate: pachete model + scaler cu manifest (metrici, checksum-uri) și promovare atomică
+import argparse
+import errno
+import json
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.neural_network.ensemble import ensemble_path_for
+from src.neural_network.numpy_engine import MODEL_H5_PATH, export_weights, file_sha256
+from src.neural_network.quantization import export_quantized, quantized_path_for
+from src.preprocessing.transform import TRANSFORM_PATH
+
+REGISTRY_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'registry'))
+# Fișierele unui pachet, cu nume fixe în directorul versiunii
+BUNDLE_MODEL = 'model.h5'
+BUNDLE_WEIGHTS = 'model.npz'
+BUNDLE_SCALER = 'scaler.json'
+# Opțional: ansamblul de lângă model (backend='ensemble'), inclus dacă există la înregistrare
+BUNDLE_ENSEMBLE = os.path.basename(ensemble_path_for(BUNDLE_MODEL))
+# Modelul cuantizat (backend='int8'): fără el, backend-ul int8 ar re-cuantiza în directorul versiunii
+# și ar modifica un pachet cu checksum-uri
+BUNDLE_INT8 = os.path.basename(quantized_path_for(BUNDLE_MODEL))
+MANIFEST = 'manifest.json'
+# Pointerul către versiunea activă; rescris atomic la promovare
+CURRENT = 'CURRENT'
+# Încercări de alocare a numărului de versiune când înregistrări concurente aleg același număr
+MAX_REGISTER_ATTEMPTS = 100
+
+
+def versions_dir(registry_dir=REGISTRY_DIR):
+    return os.path.join(registry_dir, 'versions')
+
+
+def version_dir(version, registry_dir=REGISTRY_DIR):
+    return os.path.join(versions_dir(registry_dir), version)
+
+
+def write_json_atomic(path, data):
+    """Scrie într-un fișier temporar din același director, apoi îl redenumește peste destinație."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def list_versions(registry_dir=REGISTRY_DIR):
+    """Manifestele tuturor versiunilor, în ordinea înregistrării."""
+    root = versions_dir(registry_dir)
+    if not os.path.isdir(root):
+        return []
+    manifests = []
+    for name in sorted(os.listdir(root)):
+        manifest_path = os.path.join(root, name, MANIFEST)
+        if not name.startswith('.') and os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as f:
+                manifests.append(json.load(f))
+    return manifests
+
+
+def is_current_export(npz_path, h5_path):
+    """True dacă fișierul .npz exportat există și a fost generat din conținutul actual al lui .h5."""
+    if not os.path.exists(npz_path):
+        return False
+    with np.load(npz_path, allow_pickle=False) as data:
+        return str(data['source_sha256']) == file_sha256(h5_path)
+
+
+def register_model(h5_path=MODEL_H5_PATH, transform_path=TRANSFORM_PATH, metrics=None, notes="", registry_dir=REGISTRY_DIR):
+    """Copiază modelul și scalerul într-o versiune nouă (v0001, v0002, ...); returnează numele versiunii.
+
+    Pachetul este construit într-un director temporar și apoi redenumit, deci o versiune incompletă
+    nu apare niciodată în registru. Modelul int8 de lângă .h5 este copiat dacă îi corespunde (altfel este
+    re-cuantizat în pachet), iar ansamblul de lângă model este inclus dacă există.
+    """
+    root = versions_dir(registry_dir)
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=root, prefix='.staging-')
+    try:
+        shutil.copyfile(h5_path, os.path.join(staging, BUNDLE_MODEL))
+        shutil.copyfile(transform_path, os.path.join(staging, BUNDLE_SCALER))
+        # Ponderile NumPy sunt exportate din copia .h5, ca hash-ul sursă din .npz să corespundă pachetului
+        export_weights(os.path.join(staging, BUNDLE_MODEL), os.path.join(staging, BUNDLE_WEIGHTS))
+        int8_path = quantized_path_for(h5_path)
+        if is_current_export(int8_path, h5_path):
+            shutil.copyfile(int8_path, os.path.join(staging, BUNDLE_INT8))
+        else:
+            export_quantized(os.path.join(staging, BUNDLE_MODEL), os.path.join(staging, BUNDLE_INT8))
+        bundle_files = [BUNDLE_MODEL, BUNDLE_WEIGHTS, BUNDLE_SCALER, BUNDLE_INT8]
+        if os.path.exists(ensemble_path_for(h5_path)):
+            shutil.copyfile(ensemble_path_for(h5_path), os.path.join(staging, BUNDLE_ENSEMBLE))
+            bundle_files.append(BUNDLE_ENSEMBLE)
+        files = {name: file_sha256(os.path.join(staging, name)) for name in bundle_files}
+
+        for _ in range(MAX_REGISTER_ATTEMPTS):
+            existing = [int(m['version'][1:]) for m in list_versions(registry_dir)]
+            version = f"v{max(existing, default=0) + 1:04d}"
+            manifest = {
+                'version': version,
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'source_model': os.path.abspath(h5_path),
+                'metrics': metrics or {},
+                'notes': notes,
+                'files': files,
+            }
+            write_json_atomic(os.path.join(staging, MANIFEST), manifest)
+            try:
+                os.rename(staging, version_dir(version, registry_dir))
+                return version
+            except OSError as e:
+                # Reîncercăm doar dacă altă înregistrare a ocupat între timp același număr de versiune;
+                # orice altă eroare (disc plin, director read-only etc.) este propagată
+                if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                    raise
+        raise RuntimeError(f"Nu am putut aloca un număr de versiune după {MAX_REGISTER_ATTEMPTS} încercări.")
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def verify_bundle(version, registry_dir=REGISTRY_DIR):
+    """Verifică checksum-urile din manifest; returnează lista fișierelor lipsă sau modificate."""
+    directory = version_dir(version, registry_dir)
+    with open(os.path.join(directory, MANIFEST), 'r') as f:
+        manifest = json.load(f)
+    problems = []
+    for name, expected in manifest['files'].items():
+        path = os.path.join(directory, name)
+        if not os.path.exists(path) or file_sha256(path) != expected:
+            problems.append(name)
+    return problems
+
+
+def promote(version, registry_dir=REGISTRY_DIR):
+    """Face versiunea activă: verifică pachetul și rescrie atomic pointerul CURRENT."""
+    problems = verify_bundle(version, registry_dir)
+    if problems:
+        raise ValueError(f"Versiunea {version} este coruptă (fișiere modificate sau lipsă: {problems}); promovarea a fost anulată.")
+    previous = current_version(registry_dir)
+    write_json_atomic(os.path.join(registry_dir, CURRENT), {
+        'version': version,
+        'previous': previous,
+        'promoted_at': datetime.now().isoformat(timespec='seconds'),
+    })
+    return previous
+
+
+def current_version(registry_dir=REGISTRY_DIR):
+    try:
+        with open(os.path.join(registry_dir, CURRENT), 'r') as f:
+            return json.load(f)['version']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def resolve_current(registry_dir=REGISTRY_DIR, default_model=MODEL_H5_PATH, default_transform=TRANSFORM_PATH):
+    """(calea modelului, calea scalerului, versiunea) pentru versiunea activă.
+
+    Fără registru sau fără versiune promovată se folosesc căile implicite (versiunea este None).
+    """
+    version = current_version(registry_dir)
+    if version is None:
+        return default_model, default_transform, None
+    directory = version_dir(version, registry_dir)
+    return os.path.join(directory, BUNDLE_MODEL), os.path.join(directory, BUNDLE_SCALER), version
+
+
+def print_versions(registry_dir=REGISTRY_DIR):
+    active = current_version(registry_dir)
+    manifests = list_versions(registry_dir)
+    if not manifests:
+        print(f"Registrul {registry_dir} nu conține nicio versiune.")
+        return
+    for manifest in manifests:
+        marker = '*' if manifest['version'] == active else ' '
+        metrics = ", ".join(f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in manifest['metrics'].items())
+        print(f"{marker} {manifest['version']}  {manifest['created_at']}  {metrics}  {manifest['notes']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Registrul de modele UnderMyAISkin.")
+    parser.add_argument('--registry', default=REGISTRY_DIR, help="Directorul registrului")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    register_parser = commands.add_parser('register', help="Înregistrează un model .h5 + scaler ca versiune nouă")
+    register_parser.add_argument('model', nargs='?', default=MODEL_H5_PATH)
+    register_parser.add_argument('--scaler', default=TRANSFORM_PATH)
+    register_parser.add_argument('--metrics', default=None, help="Fișier JSON cu metricile modelului")
+    register_parser.add_argument('--notes', default="")
+    register_parser.add_argument('--promote', action='store_true', help="Promovează imediat versiunea nouă")
+
+    promote_parser = commands.add_parser('promote', help="Face o versiune activă (atomic)")
+    promote_parser.add_argument('version')
+    commands.add_parser('rollback', help="Revine la versiunea activă anterior")
+    commands.add_parser('list', help="Afișează versiunile (* = activă)")
+    verify_parser = commands.add_parser('verify', help="Verifică checksum-urile unei versiuni")
+    verify_parser.add_argument('version')
+    args = parser.parse_args()
+
+    if args.command == 'register':
+        metrics = None
+        if args.metrics:
+            with open(args.metrics, 'r') as f:
+                metrics = json.load(f)
+        version = register_model(args.model, args.scaler, metrics, args.notes, args.registry)
+        print(f"Versiunea {version} a fost înregistrată.")
+        if args.promote:
+            promote(version, args.registry)
+            print(f"Versiunea {version} este acum activă.")
+    elif args.command == 'promote':
+        previous = promote(args.version, args.registry)
+        print(f"Versiunea {args.version} este acum activă (anterior: {previous or 'model implicit'}).")
+    elif args.command == 'rollback':
+        with open(os.path.join(args.registry, CURRENT), 'r') as f:
+            previous = json.load(f).get('previous')
+        if previous is None:
+            print("Nu există o versiune anterioară la care să se revină.")
+            sys.exit(1)
+        promote(previous, args.registry)
+        print(f"Versiunea {previous} este din nou activă.")
+    elif args.command == 'list':
+        print_versions(args.registry)
+    else:
+        problems = verify_bundle(args.version, args.registry)
+        print(f"Versiunea {args.version}: " + ("OK" if not problems else f"fișiere modificate sau lipsă: {problems}"))
+        sys.exit(1 if problems else 0)
@@ -0,0 +1,143 @@
+# Motor de inferenta pur NumPy pentru MLP-ul de triaj (fara TensorFlow in calea de predictie)
+import numpy as np
+import h5py
+import hashlib
+import json
+import os
+
+# Calea implicita catre modelul Keras si catre fisierul cu ponderi exportate
+MODEL_H5_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), 'dermotriage_mlp_model.h5'))
+
+
+def weights_path_for(h5_path):
+    """Fisierul .npz cu ponderi se afla langa fisierul .h5, cu acelasi nume."""
+    return os.path.splitext(h5_path)[0] + '.npz'
+
+
+def file_sha256(path):
+    """Hash-ul continutului unui fisier (folosit pentru a detecta exporturi invechite)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# --- Functii de activare (vectorizate, pe tot batch-ul) ---
+def relu(x):
+    return np.maximum(x, 0.0)
+
+def softmax(x):
+    # Scadem maximul pe fiecare rand pentru stabilitate numerica (ultima axa, ca sa mearga si pe tensori stivuiti)
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+def linear(x):
+    return x
+
+ACTIVATIONS = {'relu': relu, 'softmax': softmax, 'linear': linear}
+
+
+def export_weights(h5_path=MODEL_H5_PATH, npz_path=None):
+    """Extrage ponderile straturilor Dense din fisierul .h5 intr-un fisier .npz (doar h5py, fara TensorFlow)."""
+    npz_path = npz_path or weights_path_for(h5_path)
+
+    with h5py.File(h5_path, 'r') as f:
+        model_config = json.loads(f.attrs['model_config'])
+        weights_group = f['model_weights']
+
+        arrays = {}
+        activations = []
+        # Parcurgem straturile Dense in ordinea din arhitectura salvata
+        dense_layers = [l['config'] for l in model_config['config']['layers'] if l['class_name'] == 'Dense']
+        for i, layer in enumerate(dense_layers):
+            layer_group = weights_group[layer['name']]
+            weight_names = [n.decode() if isinstance(n, bytes) else n for n in layer_group.attrs['weight_names']]
+            kernel_name = next(n for n in weight_names if 'kernel' in n)
+            bias_name = next(n for n in weight_names if 'bias' in n)
+            arrays[f'W{i}'] = np.asarray(layer_group[kernel_name], dtype=np.float32)
+            arrays[f'b{i}'] = np.asarray(layer_group[bias_name], dtype=np.float32)
+            activations.append(layer['activation'])
+
+    np.savez(npz_path,
+             activations=np.array(activations),
+             source_sha256=np.array(file_sha256(h5_path)),
+             **arrays)
+    print(f"Ponderile ({len(activations)} straturi Dense) au fost exportate in: {npz_path}")
+    return npz_path
+
+
+class NumpyMLP:
+    """Forward pass pentru un MLP Dense, pe batch-uri de forma (N, input_dim)."""
+
+    def __init__(self, weights, biases, activations):
+        self.weights = weights
+        self.biases = biases
+        self.activations = [ACTIVATIONS[name] for name in activations]
+        self.activation_names = list(activations)
+        self.input_dim = weights[0].shape[0]
+        self.output_dim = weights[-1].shape[1]
+
+    @classmethod
+    def from_npz(cls, npz_path):
+        with np.load(npz_path, allow_pickle=False) as data:
+            activations = [str(a) for a in data['activations']]
+            weights = [data[f'W{i}'] for i in range(len(activations))]
+            biases = [data[f'b{i}'] for i in range(len(activations))]
+        return cls(weights, biases, activations)
+
+    def predict(self, X):
+        """Returneaza probabilitatile (N, output_dim) pentru un batch de intrari deja scalate."""
+        h = np.asarray(X, dtype=np.float32)
+        if h.ndim == 1:
+            h = h.reshape(1, -1)
+        for W, b, activation in zip(self.weights, self.biases, self.activations):
+            h = activation(h @ W + b)
+        return h
+
+
+def load_inference_engine(h5_path=MODEL_H5_PATH, backend='float'):
+    """Incarca motorul NumPy; re-exporta ponderile daca .npz lipseste sau nu corespunde fisierului .h5.
+
+    backend='int8' foloseste modelul cuantizat (vezi src/neural_network/quantization.py), iar
+    backend='ensemble' ansamblul de modele de langa .h5 (vezi src/neural_network/ensemble.py).
+    """
+    if backend == 'int8':
+        from src.neural_network.quantization import load_quantized_engine
+        return load_quantized_engine(h5_path)
+    if backend == 'ensemble':
+        from src.neural_network.ensemble import load_ensemble_engine
+        return load_ensemble_engine(h5_path)
+    if backend != 'float':
+        raise ValueError(f"Backend necunoscut: {backend} (valori posibile: float, int8, ensemble)")
+    npz_path = weights_path_for(h5_path)
+    needs_export = not os.path.exists(npz_path)
+    if not needs_export and os.path.exists(h5_path):
+        with np.load(npz_path, allow_pickle=False) as data:
+            needs_export = str(data['source_sha256']) != file_sha256(h5_path)
+    if needs_export:
+        export_weights(h5_path, npz_path)
+    return NumpyMLP.from_npz(npz_path)
+
+
+def verify_against_keras(h5_path, X, atol=1e-5):
+    """Compara probabilitatile motorului NumPy cu cele ale modelului Keras (necesita TensorFlow)."""
+    import tensorflow as tf
+
+    keras_probs = tf.keras.models.load_model(h5_path).predict(X, verbose=0)
+    numpy_probs = load_inference_engine(h5_path).predict(X)
+    max_diff = float(np.abs(keras_probs - numpy_probs).max())
+    return max_diff <= atol, max_diff
+
+
+if __name__ == "__main__":
+    export_weights(MODEL_H5_PATH)
+
+    # Verificare pe setul de test (daca TensorFlow este disponibil)
+    data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
+    X_test = np.loadtxt(os.path.join(data_dir, 'test', 'X_test.csv'), delimiter=",").astype(np.float32)
+    try:
+        ok, max_diff = verify_against_keras(MODEL_H5_PATH, X_test)
+        print(f"Diferenta maxima fata de Keras: {max_diff:.2e} ({'OK' if ok else 'PESTE TOLERANTA'})")
+    except ImportError:
+        print("TensorFlow nu este instalat; verificarea fata de Keras a fost sarita.")
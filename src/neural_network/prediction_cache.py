@@ -0,0 +1,254 @@
+# Cache LRU pentru predicții, indexat pe vectorul brut (discret) de simptome
+import numpy as np
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.neural_network.numpy_engine import MODEL_H5_PATH, load_inference_engine
+from src.preprocessing.transform import TRANSFORM_PATH, FeatureTransform
+from src.metrics import timed, instrument
+
+DEFAULT_MAXSIZE = 65536
+
+
+def encode_keys(raw_batch):
+    """Codifică fiecare rând brut (A1-A10 0-3, A11 0/1, A34 0-255) într-o cheie int64 unică.
+
+    Returnează (chei, mască) unde masca indică rândurile care pot fi puse în cache
+    (valori întregi în domeniu; de ex. vârstele lipsă nu sunt).
+    """
+    raw = np.asarray(raw_batch, dtype=np.float64).reshape(-1, 12)
+    cacheable = np.isfinite(raw).all(axis=1)
+    values = np.where(np.isfinite(raw), raw, 0)
+    cacheable &= (values == np.rint(values)).all(axis=1)
+    values = values.astype(np.int64)
+    cacheable &= ((values[:, :10] >= 0) & (values[:, :10] <= 3)).all(axis=1)
+    cacheable &= (values[:, 10] >= 0) & (values[:, 10] <= 1)
+    cacheable &= (values[:, 11] >= 0) & (values[:, 11] <= 255)
+
+    # Simptomele în baza 4 (10 cifre), apoi istoricul familial (1 bit) și vârsta (8 biți)
+    keys = values[:, :10] @ (4 ** np.arange(9, -1, -1, dtype=np.int64))
+    keys = (keys * 2 + values[:, 10]) * 256 + values[:, 11]
+    return keys, cacheable
+
+
+class CachedPredictor:
+    """Model + transformare + cache LRU; invalidat automat când modelul sau artefactul scalerului se schimbă.
+
+    Cu `registry_dir`, modelul și scalerul sunt cei ai versiunii promovate în registru (vezi model_registry.py),
+    iar o promovare nouă este preluată fără repornire.
+    """
+
+    def __init__(self, model_path=MODEL_H5_PATH, transform_path=TRANSFORM_PATH, maxsize=DEFAULT_MAXSIZE, backend='float',
+                 registry_dir=None):
+        # Căile implicite (folosite și când registrul nu are încă nicio versiune promovată)
+        self.default_model_path = model_path
+        self.default_transform_path = transform_path
+        self.registry_dir = registry_dir
+        self.backend = backend
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._watcher = None
+        self._swap_in(*self._load_artifacts())
+
+    def _resolve_paths(self):
+        """(model, scaler, versiune) de încărcat: versiunea activă din registru sau căile fixe."""
+        if self.registry_dir:
+            from src.neural_network.model_registry import resolve_current
+            return resolve_current(self.registry_dir, self.default_model_path, self.default_transform_path)
+        return self.default_model_path, self.default_transform_path, None
+
+    def _artifact_paths(self, model_path, transform_path):
+        paths = [model_path, transform_path]
+        if self.backend == 'ensemble':
+            # Ansamblul este un artefact separat de .h5, deci îl urmărim și pe el. O versiune promovată fără
+            # ansamblu eșuează aici (os.stat), iar firul de supraveghere păstrează modelul curent
+            from src.neural_network.ensemble import ensemble_path_for
+            paths.append(ensemble_path_for(model_path))
+        return paths
+
+    def _artifact_signature(self, model_path, transform_path, version):
+        signature = [version]
+        for path in self._artifact_paths(model_path, transform_path):
+            st = os.stat(path)
+            signature.append((st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    def _load_artifacts(self):
+        """Încarcă modelul și scalerul fără a atinge starea curentă (poate rula în paralel cu predicțiile)."""
+        model_path, transform_path, version = self._resolve_paths()
+        signature = self._artifact_signature(model_path, transform_path, version)
+        model = load_inference_engine(model_path, self.backend)
+        feature_transform = FeatureTransform.load(transform_path)
+        return signature, model, feature_transform, model_path, transform_path, version
+
+    def _swap_in(self, signature, model, feature_transform, model_path, transform_path, version):
+        self._signature = signature
+        self.model = model
+        # Ansamblul oferă și incertitudinea (deviația standard între membri, dezacordul top-1), păstrată în cache
+        # lângă probabilități: un rând din cache are atunci output_dim * 2 + 1 valori
+        self.output_dim = model.output_dim
+        self.has_uncertainty = hasattr(model, 'predict_with_uncertainty')
+        self.row_width = self.output_dim * 2 + 1 if self.has_uncertainty else self.output_dim
+        self.feature_transform = feature_transform
+        self.model_path = model_path
+        self.transform_path = transform_path
+        self.version = version
+
+    def refresh(self):
+        """Reîncarcă modelul/scalerul dacă s-au schimbat (fișiere modificate sau altă versiune promovată).
+
+        Încărcarea se face în afara lock-ului, deci predicțiile continuă cu modelul vechi între timp;
+        sub lock are loc doar schimbul referințelor și golirea cache-ului. Returnează True la schimbare.
+        """
+        if self._artifact_signature(*self._resolve_paths()) == self._signature:
+            return False
+        state = self._load_artifacts()
+        with self._lock:
+            previous_version = self.version
+            self._swap_in(*state)
+            self._cache.clear()
+            self.invalidations += 1
+        if self.registry_dir and self.version != previous_version:
+            print(f"Model actualizat la versiunea {self.version} (anterior: {previous_version or 'model implicit'}).")
+        return True
+
+    def start_watcher(self, interval=2.0):
+        """Fir daemon care verifică periodic registrul/fișierele și preia modelul nou în fundal.
+
+        Cât timp firul rulează, predict_raw nu mai verifică fișierele la fiecare apel.
+        """
+        if self._watcher is not None:
+            return self._watcher
+
+        def watch():
+            last_error = None
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                    last_error = None
+                except Exception as e:
+                    # O versiune incompletă sau coruptă nu oprește serviciul: rămânem pe modelul curent.
+                    # Aceeași eroare este afișată o singură dată, nu la fiecare verificare
+                    if str(e) != last_error:
+                        print(f"Reîncărcarea modelului a eșuat, se păstrează versiunea {self.version}: {e}")
+                    last_error = str(e)
+
+        self._watcher = threading.Thread(target=watch, name='model-watcher', daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    def _compute(self, raw_rows):
+        with timed('scaling'):
+            X = self.feature_transform.transform(raw_rows)
+        with timed('model_predict'):
+            if not self.has_uncertainty:
+                return self.model.predict(X)
+            mean, std, disagreement = self.model.predict_with_uncertainty(X)
+            return np.hstack([mean, std, disagreement[:, None]])
+
+    @instrument('predict_raw')
+    def predict_raw(self, raw_batch):
+        """Probabilitățile (N, 6) pentru un batch de vectori bruti; rândurile din cache nu mai trec prin model."""
+        return self._predict_rows(raw_batch)[:, :self.output_dim]
+
+    @instrument('predict_raw')
+    def predict_raw_with_uncertainty(self, raw_batch):
+        """(probabilități (N, 6), deviația standard între membri (N, 6), dezacordul top-1 (N,)).
+
+        Doar backend-ul 'ensemble' are incertitudine; pentru celelalte ultimele două valori sunt None.
+        """
+        rows = self._predict_rows(raw_batch)
+        n = self.output_dim
+        if rows.shape[1] == n:
+            return rows, None, None
+        return rows[:, :n], rows[:, n:2 * n], rows[:, 2 * n]
+
+    def _predict_rows(self, raw_batch):
+        raw = np.asarray(raw_batch, dtype=np.float64).reshape(-1, 12)
+        keys, cacheable = encode_keys(raw)
+
+        if self._watcher is None:
+            self.refresh()
+        with self._lock:
+            output = np.empty((len(raw), self.row_width), dtype=np.float32)
+
+            # Rândurile care nu pot fi puse în cache trec direct prin model
+            if not cacheable.all():
+                output[~cacheable] = self._compute(raw[~cacheable])
+            if not cacheable.any():
+                return output
+
+            # Fiecare cheie distinctă este căutată o singură dată
+            cached_idx = np.flatnonzero(cacheable)
+            unique_keys, first_idx, inverse = np.unique(keys[cached_idx], return_index=True, return_inverse=True)
+            unique_probs = np.empty((len(unique_keys), self.row_width), dtype=np.float32)
+
+            missing = []
+            for i, key in enumerate(unique_keys.tolist()):
+                probs = self._cache.get(key)
+                if probs is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    unique_probs[i] = probs
+            # Hit = rând a cărui cheie era deja în cache; o cheie lipsă este un singur miss, chiar dacă
+            # apare de mai multe ori în batch (duplicatele ei nu sunt numărate ca hit-uri)
+            rows_per_key = np.bincount(inverse, minlength=len(unique_keys))
+            self.misses += len(missing)
+            self.hits += int(rows_per_key.sum() - rows_per_key[missing].sum())
+
+            # Un singur forward pass pentru toate cheile lipsă
+            if missing:
+                missing = np.array(missing)
+                computed = self._compute(raw[cached_idx[first_idx[missing]]])
+                unique_probs[missing] = computed
+                # Copii pe rând: o vedere în `computed` ar ține în viață tot batch-ul cât timp rămâne o intrare în cache
+                for key, probs in zip(unique_keys[missing].tolist(), computed):
+                    self._cache[key] = probs.copy()
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+                    self.evictions += 1
+
+            output[cached_idx] = unique_probs[inverse]
+            return output
+
+    @instrument('predict_uncached')
+    def predict_uncached(self, raw_batch):
+        """Probabilitățile fără cache: nu modifică LRU-ul și nici statisticile hit/miss.
+
+        Pentru loturi sintetice (ex. variantele analizei what-if), care altfel ar scoate din cache cazurile reale.
+        Calculul rulează în afara lock-ului, deci nu blochează predicțiile obișnuite.
+        """
+        raw = np.asarray(raw_batch, dtype=np.float64).reshape(-1, 12)
+        if self._watcher is None:
+            self.refresh()
+        with self._lock:
+            feature_transform, model = self.feature_transform, self.model
+        return model.predict(feature_transform.transform(raw))
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'size': len(self._cache),
+            'maxsize': self.maxsize,
+            'hit_rate': self.hits / total if total else 0.0,
+            'model_version': self.version,
+        }
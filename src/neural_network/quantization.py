@@ -0,0 +1,241 @@
+# Cuantizare post-antrenare int8 a MLP-ului de triaj + motor de inferență cu nuclee întregi (doar NumPy)
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.neural_network.numpy_engine import (
+    MODEL_H5_PATH, ACTIVATIONS, file_sha256, load_inference_engine, weights_path_for,
+)
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
+CALIBRATION_PATH = os.path.join(DATA_DIR, 'train', 'X_train.csv')
+INT8_MIN, INT8_MAX = -128, 127
+# Precizia multiplicatorului de recuantizare în virgulă fixă (ca în TFLite: mantisă pe 31 de biți)
+MULTIPLIER_BITS = 31
+
+
+def quantized_path_for(h5_path):
+    """Modelul cuantizat se află lângă fișierul .h5: <nume>.int8.npz."""
+    return os.path.splitext(h5_path)[0] + '.int8.npz'
+
+
+def activation_params(low, high):
+    """Scală și zero-point int8 asimetrice pentru intervalul [low, high] (care conține mereu 0)."""
+    low, high = min(float(low), 0.0), max(float(high), 0.0)
+    scale = (high - low) / (INT8_MAX - INT8_MIN) or 1.0
+    zero_point = int(np.clip(round(INT8_MIN - low / scale), INT8_MIN, INT8_MAX))
+    return scale, zero_point
+
+
+def quantize_multiplier(multiplier):
+    """Descompune multiplicatori reali în (mantisă int64, deplasare) astfel încât m ≈ mantisă * 2^-deplasare."""
+    multiplier = np.asarray(multiplier, dtype=np.float64)
+    mantissa, exponent = np.frexp(multiplier)
+    m0 = np.round(mantissa * (1 << MULTIPLIER_BITS)).astype(np.int64)
+    shift = (MULTIPLIER_BITS - exponent).astype(np.int64)
+    return m0, shift
+
+
+def quantize_model(mlp, X_calibration):
+    """Cuantizare int8: ponderi simetrice pe fiecare neuron de ieșire, activări asimetrice pe tensor.
+
+    Intervalele activărilor sunt calibrate rulând modelul float pe setul reprezentativ (X_train).
+    Returnează dicționarul de array-uri salvat în fișierul .int8.npz.
+    """
+    h = np.asarray(X_calibration, dtype=np.float32)
+    arrays = {}
+    for i, (W, b, name) in enumerate(zip(mlp.weights, mlp.biases, mlp.activation_names)):
+        in_scale, in_zero_point = activation_params(h.min(), h.max())
+        w_scale = np.abs(W).max(axis=0) / INT8_MAX
+        w_scale[w_scale == 0] = 1.0
+
+        arrays[f'W{i}'] = np.clip(np.round(W / w_scale), -INT8_MAX, INT8_MAX).astype(np.int8)
+        arrays[f'b{i}'] = np.round(b / (in_scale * w_scale)).astype(np.int32)
+        arrays[f'w_scale{i}'] = w_scale.astype(np.float32)
+        arrays[f'in_scale{i}'] = np.array(in_scale, dtype=np.float64)
+        arrays[f'in_zero_point{i}'] = np.array(in_zero_point, dtype=np.int32)
+        h = ACTIVATIONS[name](h @ W + b)
+    arrays['activations'] = np.array(mlp.activation_names)
+    return arrays
+
+
+def export_quantized(h5_path=MODEL_H5_PATH, int8_path=None, X_calibration=None):
+    """Scrie modelul int8 lângă .h5 (calibrat implicit pe X_train)."""
+    int8_path = int8_path or quantized_path_for(h5_path)
+    if X_calibration is None:
+        X_calibration = np.loadtxt(CALIBRATION_PATH, delimiter=",")
+    arrays = quantize_model(load_inference_engine(h5_path), X_calibration)
+    np.savez(int8_path, source_sha256=np.array(file_sha256(h5_path)), **arrays)
+    print(f"Modelul cuantizat int8 ({len(arrays['activations'])} straturi Dense) a fost salvat în: {int8_path}")
+    return int8_path
+
+
+class QuantizedMLP:
+    """Forward pass cu nuclee întregi: int8 x int8 -> acumulare int32, recuantizare în virgulă fixă.
+
+    Doar intrarea este cuantizată din float și doar logit-urile ultimului strat sunt readuse în float
+    (pentru softmax), astfel încât interfața este aceeași ca la NumpyMLP.
+    """
+
+    def __init__(self, weights, biases, w_scales, in_scales, in_zero_points, activations):
+        self.weights = weights
+        self.biases = biases
+        self.activation_names = list(activations)
+        self.in_scales = in_scales
+        self.in_zero_points = in_zero_points
+        self.input_dim = weights[0].shape[0]
+        self.output_dim = weights[-1].shape[1]
+        self.nbytes = sum(W.nbytes for W in weights) + sum(b.nbytes for b in biases)
+
+        # Ultimul strat: scala acumulatorului (pentru dequantizare); restul: multiplicatori către stratul următor
+        self.output_scale = in_scales[-1] * w_scales[-1].astype(np.float64)
+        self.requant = [quantize_multiplier(in_scales[i] * w_scales[i].astype(np.float64) / in_scales[i + 1])
+                        for i in range(len(weights) - 1)]
+
+    @classmethod
+    def from_npz(cls, int8_path):
+        with np.load(int8_path, allow_pickle=False) as data:
+            activations = [str(a) for a in data['activations']]
+            layers = range(len(activations))
+            return cls([data[f'W{i}'] for i in layers],
+                       [data[f'b{i}'] for i in layers],
+                       [data[f'w_scale{i}'] for i in layers],
+                       [float(data[f'in_scale{i}']) for i in layers],
+                       [int(data[f'in_zero_point{i}']) for i in layers],
+                       activations)
+
+    def predict(self, X):
+        """Returnează probabilitățile (N, output_dim) pentru un batch de intrări deja scalate."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        q = np.clip(np.round(X / self.in_scales[0]) + self.in_zero_points[0], INT8_MIN, INT8_MAX).astype(np.int32)
+
+        last = len(self.weights) - 1
+        for i, (W, b, name) in enumerate(zip(self.weights, self.biases, self.activation_names)):
+            acc = (q - self.in_zero_points[i]) @ W.astype(np.int32) + b
+            if i == last:
+                return ACTIVATIONS[name](acc * self.output_scale).astype(np.float32)
+
+            # Recuantizare: acc * M (M = mantisă * 2^-deplasare), cu rotunjire, apoi zero-point-ul stratului următor
+            m0, shift = self.requant[i]
+            q = ((acc.astype(np.int64) * m0 + (np.int64(1) << (shift - 1))) >> shift) + self.in_zero_points[i + 1]
+            low = self.in_zero_points[i + 1] if name == 'relu' else INT8_MIN
+            q = np.clip(q, low, INT8_MAX).astype(np.int32)
+
+
+def load_quantized_engine(h5_path=MODEL_H5_PATH):
+    """Încarcă motorul int8; re-cuantizează dacă fișierul lipsește sau nu corespunde fișierului .h5."""
+    int8_path = quantized_path_for(h5_path)
+    needs_export = not os.path.exists(int8_path)
+    if not needs_export and os.path.exists(h5_path):
+        with np.load(int8_path, allow_pickle=False) as data:
+            needs_export = str(data['source_sha256']) != file_sha256(h5_path)
+    if needs_export:
+        export_quantized(h5_path, int8_path)
+    return QuantizedMLP.from_npz(int8_path)
+
+
+def peak_rss_mb(backend, h5_path=MODEL_H5_PATH):
+    """Memoria maximă (MB) a unui proces nou care încarcă modelul și face o predicție."""
+    loaders = {
+        'keras': "import tensorflow as tf; m = tf.keras.models.load_model(p); m.predict(x, verbose=0)",
+        'float': "from src.neural_network.numpy_engine import load_inference_engine as l; l(p).predict(x)",
+        'int8': "from src.neural_network.quantization import load_quantized_engine as l; l(p).predict(x)",
+    }
+    root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    code = (f"import resource, numpy as np; p = {h5_path!r}; x = np.zeros((1, 12), dtype=np.float32);"
+            f"{loaders[backend]}; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)")
+    out = subprocess.run([sys.executable, '-c', code], cwd=root_dir, capture_output=True, text=True)
+    if out.returncode != 0:
+        return None
+    # ru_maxrss este în KB pe Linux
+    return int(out.stdout.split()[-1]) / 1024
+
+
+def mean_latency_us(engine, X, repeat=1000):
+    engine.predict(X)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        engine.predict(X)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def quantization_report(h5_path=MODEL_H5_PATH, X_test=None, y_test=None, measure_memory=True):
+    """Acuratețea pe setul de test salvat, dimensiunea și memoria: model float vs. int8."""
+    if X_test is None:
+        X_test = np.loadtxt(os.path.join(DATA_DIR, 'test', 'X_test.csv'), delimiter=",")
+        y_test = np.loadtxt(os.path.join(DATA_DIR, 'test', 'y_test.csv'), delimiter=",")
+    y_true = np.asarray(y_test).argmax(axis=1)
+
+    float_engine = load_inference_engine(h5_path)
+    int8_engine = load_quantized_engine(h5_path)
+    float_probs = float_engine.predict(X_test)
+    int8_probs = int8_engine.predict(X_test)
+    float_accuracy = float((float_probs.argmax(axis=1) == y_true).mean())
+    int8_accuracy = float((int8_probs.argmax(axis=1) == y_true).mean())
+
+    report = {
+        'n_test': int(len(y_true)),
+        'accuracy_float': float_accuracy,
+        'accuracy_int8': int8_accuracy,
+        'accuracy_delta': int8_accuracy - float_accuracy,
+        'top1_agreement': float((float_probs.argmax(axis=1) == int8_probs.argmax(axis=1)).mean()),
+        'max_abs_prob_diff': float(np.abs(float_probs - int8_probs).max()),
+        'file_size_bytes': {
+            'h5': os.path.getsize(h5_path),
+            'float_npz': os.path.getsize(weights_path_for(h5_path)),
+            'int8_npz': os.path.getsize(quantized_path_for(h5_path)),
+        },
+        'weight_bytes': {
+            'float': sum(W.nbytes + b.nbytes for W, b in zip(float_engine.weights, float_engine.biases)),
+            'int8': int8_engine.nbytes,
+        },
+        'single_row_latency_us': {
+            'float': mean_latency_us(float_engine, X_test[:1]),
+            'int8': mean_latency_us(int8_engine, X_test[:1]),
+        },
+    }
+    if measure_memory:
+        report['peak_rss_mb'] = {backend: peak_rss_mb(backend, h5_path) for backend in ('keras', 'float', 'int8')}
+    return report
+
+
+def print_report(report):
+    print(f"\nAcuratețe pe setul de test ({report['n_test']} exemple): "
+          f"float {report['accuracy_float'] * 100:.2f}% | int8 {report['accuracy_int8'] * 100:.2f}% "
+          f"(diferență {report['accuracy_delta'] * 100:+.2f} pp)")
+    print(f"Acord top-1: {report['top1_agreement'] * 100:.2f}% | diferență maximă de probabilitate: "
+          f"{report['max_abs_prob_diff']:.4f}")
+    sizes = report['file_size_bytes']
+    print(f"Fișiere: .h5 {sizes['h5'] / 1024:.1f} KB | float .npz {sizes['float_npz'] / 1024:.1f} KB | "
+          f"int8 .npz {sizes['int8_npz'] / 1024:.1f} KB")
+    weights = report['weight_bytes']
+    print(f"Ponderi în memorie: float {weights['float']} B | int8 {weights['int8']} B")
+    latency = report['single_row_latency_us']
+    print(f"Latență (1 rând): float {latency['float']:.1f} µs | int8 {latency['int8']:.1f} µs")
+    if 'peak_rss_mb' in report:
+        rss = ", ".join(f"{k} {v:.0f} MB" if v is not None else f"{k} n/a" for k, v in report['peak_rss_mb'].items())
+        print(f"Memorie maximă a procesului (încărcare + o predicție): {rss}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cuantizare int8 a modelului de triaj și raport float vs. int8.")
+    parser.add_argument('--model', default=MODEL_H5_PATH, help="Fișierul .h5 al modelului")
+    parser.add_argument('--no-memory', action='store_true', help="Nu măsura memoria proceselor (fără TensorFlow)")
+    parser.add_argument('--output', default=None, help="Fișier JSON pentru raport")
+    args = parser.parse_args()
+
+    export_quantized(args.model)
+    report = quantization_report(args.model, measure_memory=not args.no_memory)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"Raportul a fost salvat în: {args.output}")
@@ -0,0 +1,140 @@
+# Căutare de hiperparametri (grid / random) peste model_params.json, cu antrenări în paralel
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing as mp
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.preprocessing.dataset_cache import DATA_DIR, CACHE_DIR, load_datasets
+
+CONFIG_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'config'))
+
+# Seturile de date din fiecare proces worker (încărcate o singură dată, în initializer)
+_worker_data = None
+
+
+def expand_spec(spec, base_config):
+    """Lista de configurații de antrenat, pornind de la config-ul de bază.
+
+    Spec-ul are fie {"grid": {param: [valori]}} (produs cartezian), fie
+    {"random": {"n_trials": N, "seed": S, "space": {param: [valori]}}} (eșantionare aleatoare).
+    """
+    if 'grid' in spec:
+        names = list(spec['grid'])
+        combinations = itertools.product(*(spec['grid'][name] for name in names))
+        overrides = [dict(zip(names, values)) for values in combinations]
+    elif 'random' in spec:
+        random_spec = spec['random']
+        rng = random.Random(random_spec.get('seed', 42))
+        space = random_spec['space']
+        overrides = [{name: rng.choice(values) for name, values in space.items()} for _ in range(random_spec['n_trials'])]
+    else:
+        raise ValueError("Spec-ul trebuie să conțină cheia 'grid' sau 'random'.")
+
+    return [dict(base_config, **override) for override in overrides]
+
+
+def describe_layers(layer_structure):
+    return '-'.join(f"{layer['neurons']}{layer['activation'][0]}" for layer in layer_structure)
+
+
+def limit_tf_threads():
+    """Fiecare worker rulează TensorFlow pe un singur fir, ca procesele să nu-și împartă nucleele."""
+    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+    os.environ['OMP_NUM_THREADS'] = '1'
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(1)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def _init_worker(data_dir, cache_dir):
+    global _worker_data
+    limit_tf_threads()
+
+    # Seturile vin din cache-ul .npy memory-mapped: paginile sunt partajate de toate procesele prin OS
+    _worker_data = load_datasets(data_dir, cache_dir)
+
+
+def _train_one(trial_id, config):
+    import tensorflow as tf
+    from src.neural_network.model import create_mlp_model
+
+    if 'seed' in config:
+        tf.keras.utils.set_random_seed(config['seed'])
+    data = _worker_data
+    start = time.perf_counter()
+    model = create_mlp_model(config)
+    model.fit(data['X_train'], data['y_train'],
+              epochs=config['training_epochs'], batch_size=config['batch_size'],
+              validation_data=(data['X_val'], data['y_val']), verbose=0)
+    _, val_accuracy = model.evaluate(data['X_val'], data['y_val'], verbose=0)
+    _, test_accuracy = model.evaluate(data['X_test'], data['y_test'], verbose=0)
+    return {
+        'trial': trial_id,
+        'layers': describe_layers(config['layer_structure']),
+        'batch_size': config['batch_size'],
+        'training_epochs': config['training_epochs'],
+        'val_accuracy': float(val_accuracy),
+        'test_accuracy': float(test_accuracy),
+        'wall_time_s': time.perf_counter() - start,
+        'config': config,
+    }
+
+
+def run_sweep(configs, workers=None, data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+    """Antrenează configurațiile în paralel; returnează rezultatele sortate după acuratețea pe validare."""
+    # Construim cache-ul binar o singură dată, în procesul principal, înainte de pornirea workerilor
+    load_datasets(data_dir, cache_dir)
+
+    workers = workers or os.cpu_count()
+    results = []
+    # 'spawn' pentru ca fiecare worker să pornească TensorFlow curat (fără starea procesului părinte)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn'),
+                             initializer=_init_worker, initargs=(data_dir, cache_dir)) as pool:
+        futures = [pool.submit(_train_one, i, config) for i, config in enumerate(configs)]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"  [{len(results)}/{len(configs)}] {result['layers']} bs={result['batch_size']}: "
+                  f"val {result['val_accuracy'] * 100:.2f}% ({result['wall_time_s']:.1f} s)")
+
+    return sorted(results, key=lambda r: (r['val_accuracy'], r['test_accuracy']), reverse=True)
+
+
+def print_results_table(results):
+    print(f"\n{'Rang':>4} | {'Straturi':<16} | {'Batch':>5} | {'Epoci':>5} | {'Val acc':>8} | {'Test acc':>8} | {'Timp (s)':>8}")
+    print('-' * 74)
+    for rank, r in enumerate(results, 1):
+        print(f"{rank:>4} | {r['layers']:<16} | {r['batch_size']:>5} | {r['training_epochs']:>5} | "
+              f"{r['val_accuracy'] * 100:>7.2f}% | {r['test_accuracy'] * 100:>7.2f}% | {r['wall_time_s']:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Căutare paralelă de hiperparametri pentru MLP-ul de triaj.")
+    parser.add_argument('spec', help="Fișier JSON cu spec-ul de căutare (vezi config/sweep_example.json)")
+    parser.add_argument('--workers', type=int, default=None, help="Numărul de procese (implicit: numărul de nuclee)")
+    parser.add_argument('--output', default=None, help="Fișier JSON în care se salvează rezultatele sortate")
+    args = parser.parse_args()
+
+    # Citim config-ul direct (nu prin model.load_model_config) ca procesul principal să nu importe TensorFlow
+    with open(os.path.join(CONFIG_DIR, 'model_params.json'), 'r') as f:
+        base_config = json.load(f)
+    with open(args.spec, 'r') as f:
+        spec = json.load(f)
+
+    configs = expand_spec(spec, base_config)
+    print(f"Încep căutarea: {len(configs)} configurații, {args.workers or os.cpu_count()} procese.")
+    start = time.perf_counter()
+    results = run_sweep(configs, args.workers)
+    print_results_table(results)
+    print(f"\nTimp total: {time.perf_counter() - start:.1f} s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"Rezultatele au fost salvate în: {args.output}")
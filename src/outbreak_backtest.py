@@ -0,0 +1,216 @@
+# Backtesting vectorizat al alertelor epidemice pe istoricul din tabelul `cases`
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src import database_manager
+from src.database_manager import ALERT_THRESHOLD, ALERT_PERIOD_DAYS
+from src.triage_common import DIAGNOSES
+
+DEFAULT_WINDOWS = (3, 5, 7, 10, 14, 21, 28)
+DEFAULT_THRESHOLDS = tuple(range(2, 21))
+N_CLASSES = len(DIAGNOSES)
+
+
+def day_edges(first_ts, last_ts):
+    """Începuturile zilelor locale (epoch) care acoperă [first_ts, last_ts], plus sfârșitul ultimei zile."""
+    first_day = datetime.fromtimestamp(int(first_ts)).replace(hour=0, minute=0, second=0, microsecond=0)
+    n_days = (datetime.fromtimestamp(int(last_ts)).date() - first_day.date()).days + 1
+    # Miezul nopții local calculat pe calendar (nu first_ts + k * 86400), ca să rămână corect la schimbarea orei
+    days = [first_day + timedelta(days=k) for k in range(n_days + 1)]
+    return np.array([int(d.timestamp()) for d in days], dtype=np.int64), [d.date() for d in days[:-1]]
+
+
+def daily_class_counts(classes, timestamps, edges):
+    """Matricea (zile, clase) cu numărul de cazuri pe zi și clasă (clasele 1-6 -> coloanele 0-5)."""
+    day_idx = np.searchsorted(edges, timestamps, side='right') - 1
+    n_days = len(edges) - 1
+    flat = day_idx * N_CLASSES + (classes - 1)
+    return np.bincount(flat, minlength=n_days * N_CLASSES).reshape(n_days, N_CLASSES)
+
+
+def window_counts(daily, windows):
+    """Numărătorile glisante (ferestre, zile, clase): cazurile din ultimele W zile, inclusiv ziua curentă.
+
+    Cu sumele cumulative C, fereastra de W zile care se termină în ziua d este C[d] - C[d - W],
+    deci toate ferestrele și toate zilele se obțin din aceeași sumă, fără nicio interogare în plus.
+    """
+    cumulative = np.zeros((len(daily) + 1, N_CLASSES), dtype=np.int64)
+    np.cumsum(daily, axis=0, out=cumulative[1:])
+    end = np.arange(1, len(daily) + 1)
+    return np.stack([cumulative[end] - cumulative[np.maximum(end - w, 0)] for w in windows])
+
+
+def episode_stats(alerts):
+    """Pentru un tablou boolean (..., zile): numărul de episoade (porniri) și cel mai lung episod, în zile."""
+    padded = np.concatenate([np.zeros(alerts.shape[:-1] + (1,), dtype=bool), alerts,
+                             np.zeros(alerts.shape[:-1] + (1,), dtype=bool)], axis=-1)
+    changes = np.diff(padded.astype(np.int8), axis=-1)
+    starts = changes == 1
+    n_episodes = starts.sum(axis=-1)
+
+    # Lungimea episodului = distanța dintre fiecare pornire și următoarea oprire
+    longest = np.zeros(alerts.shape[:-1], dtype=np.int64)
+    for idx in np.ndindex(alerts.shape[:-1]):
+        start_pos = np.flatnonzero(starts[idx])
+        if len(start_pos):
+            longest[idx] = (np.flatnonzero(changes[idx] == -1) - start_pos).max()
+    return n_episodes, longest
+
+
+def backtest_daily(daily, days, windows=DEFAULT_WINDOWS, thresholds=DEFAULT_THRESHOLDS, warmup=0):
+    """Rulează regula de alertă (clasă cu >= prag cazuri în ultimele W zile) la sfârșitul fiecărei zile.
+
+    `daily` este matricea (zile, clase) cu numărul de cazuri pe zi. Primele `warmup` zile servesc doar la
+    completarea ferestrelor și sunt eliminate din rezultat. Returnează dicționarul cu zilele, numărătorile
+    (ferestre, zile, clase), alertele (ferestre, praguri, zile, clase) și masca `complete` (ferestre, zile):
+    False pentru zilele a căror fereastră începe înaintea datelor încărcate (numărătoare trunchiată).
+    """
+    windows = np.asarray(windows, dtype=np.int64)
+    thresholds = np.asarray(thresholds, dtype=np.int64)
+    counts = window_counts(daily, windows)
+    # Toate combinațiile prag x fereastră dintr-o singură comparație cu broadcasting
+    alerts = counts[:, None, :, :] >= thresholds[None, :, None, None]
+    complete = np.arange(len(daily))[None, :] >= windows[:, None] - 1
+    return {'days': days[warmup:], 'windows': windows, 'thresholds': thresholds, 'counts': counts[:, warmup:],
+            'alerts': alerts[:, :, warmup:], 'complete': complete[:, warmup:]}
+
+
+def backtest(classes, timestamps, windows=DEFAULT_WINDOWS, thresholds=DEFAULT_THRESHOLDS, start_ts=None):
+    """Ca backtest_daily, pornind de la cazurile individuale (diagnosis_class, prediction_ts).
+
+    Cu `start_ts`, analiza începe în ziua lui start_ts, iar cazurile din cele max(W) - 1 zile anterioare
+    completează ferestrele primelor zile. Fără el, analiza începe la primul caz, iar primele W - 1 zile
+    sunt marcate incomplete.
+    """
+    if start_ts is None:
+        edges, days = day_edges(timestamps.min(), timestamps.max())
+        return backtest_daily(daily_class_counts(classes, timestamps, edges), days, windows, thresholds)
+
+    warmup = int(max(windows)) - 1
+    warmup_start = datetime.fromtimestamp(int(start_ts)).replace(hour=0, minute=0, second=0, microsecond=0)
+    warmup_start = int((warmup_start - timedelta(days=warmup)).timestamp())
+    keep = timestamps >= warmup_start
+    classes, timestamps = classes[keep], timestamps[keep]
+    edges, days = day_edges(warmup_start, max(timestamps.max(), start_ts))
+    return backtest_daily(daily_class_counts(classes, timestamps, edges), days, windows, thresholds, warmup)
+
+
+def summarize(result):
+    """Statistici pe fiecare combinație (fereastră, prag): zile cu alertă, episoade, prima alertă, detalii pe clasă."""
+    alerts = result['alerts']
+    any_alert = alerts.any(axis=3)
+    alert_days = any_alert.sum(axis=2)
+    n_episodes, longest = episode_stats(any_alert)
+    class_days = alerts.sum(axis=2)
+    class_episodes, _ = episode_stats(np.moveaxis(alerts, 3, 2))
+    first_day = np.where(any_alert.any(axis=2), any_alert.argmax(axis=2), -1)
+    incomplete_days = (~result['complete']).sum(axis=1)
+
+    n_days = len(result['days'])
+    rows = []
+    for i, window in enumerate(result['windows']):
+        for j, threshold in enumerate(result['thresholds']):
+            rows.append({
+                'window_days': int(window),
+                'threshold': int(threshold),
+                'alert_days': int(alert_days[i, j]),
+                'alert_fraction': float(alert_days[i, j] / n_days),
+                'episodes': int(n_episodes[i, j]),
+                'longest_episode_days': int(longest[i, j]),
+                'first_alert': result['days'][first_day[i, j]].isoformat() if first_day[i, j] >= 0 else None,
+                'incomplete_days': int(incomplete_days[i]),
+                'alert_days_per_class': {str(c + 1): int(class_days[i, j, c]) for c in range(N_CLASSES)},
+                'episodes_per_class': {str(c + 1): int(class_episodes[i, j, c]) for c in range(N_CLASSES)},
+            })
+    return rows
+
+
+def write_timeline(result, path):
+    """CSV lung cu fiecare alertă: data, fereastra, pragul, clasa, numărul de cazuri din fereastră și
+    dacă fereastra are istoric complet (0 = numărătoare trunchiată la începutul datelor)."""
+    w_idx, t_idx, d_idx, c_idx = np.nonzero(result['alerts'])
+    counts = result['counts'][w_idx, d_idx, c_idx]
+    complete = result['complete'][w_idx, d_idx]
+    with open(path, 'w') as f:
+        f.write("date,window_days,threshold,diagnosis_class,window_count,complete\n")
+        for w, t, d, c, n, ok in zip(w_idx, t_idx, d_idx, c_idx, counts, complete):
+            f.write(f"{result['days'][d].isoformat()},{result['windows'][w]},{result['thresholds'][t]},{c + 1},{n},{int(ok)}\n")
+    return len(w_idx)
+
+
+def print_summary(rows, n_days):
+    print(f"\n{'Fereastră':>9} {'Prag':>5} {'Zile cu alertă':>15} {'Episoade':>9} {'Cel mai lung':>13} {'Prima alertă':>13}")
+    for row in rows:
+        marker = "  <- regula curentă" if (row['window_days'], row['threshold']) == (ALERT_PERIOD_DAYS, ALERT_THRESHOLD) else ""
+        print(f"{row['window_days']:>9} {row['threshold']:>5} {row['alert_days']:>7} ({row['alert_fraction'] * 100:5.1f}%) "
+              f"{row['episodes']:>9} {row['longest_episode_days']:>13} {row['first_alert'] or '-':>13}{marker}")
+    print(f"\nPerioadă analizată: {n_days} zile")
+    incomplete = max(row['incomplete_days'] for row in rows)
+    if incomplete:
+        print(f"Primele {incomplete} zile au ferestre incomplete (istoric insuficient); alertele pot lipsi acolo.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtesting al alertelor epidemice pe istoricul cazurilor.")
+    parser.add_argument('--db', default=None, help="Baza de date (implicit: baza de date a aplicației)")
+    parser.add_argument('--windows', type=int, nargs='+', default=list(DEFAULT_WINDOWS), help="Lungimile ferestrelor, în zile")
+    parser.add_argument('--thresholds', type=int, nargs='+', default=list(DEFAULT_THRESHOLDS), help="Pragurile de cazuri")
+    parser.add_argument('--days', type=int, default=365, help="Numărul de zile analizate, până la ultima zi cu cazuri (din agregatul daily_counts)")
+    parser.add_argument('--since', default=None, help="Doar cazurile de la această dată (YYYY-MM-DD); înlocuiește --days")
+    parser.add_argument('--from-cases', action='store_true', help="Recalculează numărătorile din tabelul cases în loc de agregat")
+    parser.add_argument('--output', default=None, help="Fișier JSON cu statisticile pe combinații")
+    parser.add_argument('--timeline', default=None, help="Fișier CSV cu toate alertele (data, fereastră, prag, clasă)")
+    args = parser.parse_args()
+    since = None
+    if args.since:
+        try:
+            since = datetime.strptime(args.since, '%Y-%m-%d')
+        except ValueError:
+            parser.error(f"Data --since invalidă: {args.since} (format așteptat: YYYY-MM-DD)")
+
+    if args.db:
+        database_manager.configure_database(args.db)
+    database_manager.initialize_database()
+    # Istoricul se încarcă o singură dată; tot restul se calculează în memorie
+    if args.from_cases:
+        classes, timestamps, _ = database_manager.load_cases_array()
+        since_ts = int(since.timestamp()) if since else None
+        if len(classes) == 0 or (since_ts is not None and timestamps.max() < since_ts):
+            print("Nu există cazuri de analizat.")
+            sys.exit(0)
+        # Cu --since, cazurile dinaintea datei completează doar ferestrele primelor zile
+        start_ts = max(since_ts, int(timestamps.min())) if since_ts is not None else None
+        result = backtest(classes, timestamps, args.windows, args.thresholds, start_ts)
+    else:
+        # Agregatul zilnic: citirea costă O(zile), indiferent de numărul de cazuri.
+        # Perioada este limitată la zilele cu date (ca la --from-cases, care merge de la primul la ultimul caz),
+        # altfel zilele goale dinaintea primului caz ar dilua alert_fraction
+        data_range = database_manager.daily_counts_range(N_CLASSES)
+        if data_range is None:
+            print("Nu există cazuri de analizat.")
+            sys.exit(0)
+        first_day, last_day = data_range
+        start_day = max(first_day, since.date() if since else last_day - timedelta(days=args.days - 1))
+        n_days = (last_day - start_day).days + 1
+        if n_days < 1:
+            print("Nu există cazuri de analizat.")
+            sys.exit(0)
+        # Încărcăm și cele max(W) - 1 zile dinaintea perioadei, ca ferestrele primelor zile să fie complete
+        warmup = max(args.windows) - 1
+        days, daily = database_manager.load_daily_counts(n_days + warmup, end=last_day, n_classes=N_CLASSES)
+        result = backtest_daily(daily, days, args.windows, args.thresholds, warmup)
+    rows = summarize(result)
+    print_summary(rows, len(result['days']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(rows, f, indent=4)
+        print(f"Statisticile au fost salvate în: {args.output}")
+    if args.timeline:
+        n = write_timeline(result, args.timeline)
+        print(f"Cronologia alertelor ({n} rânduri) a fost salvată în: {args.timeline}")
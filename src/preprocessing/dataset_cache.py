@@ -0,0 +1,161 @@
+# Cache binar (.npy, memory-mapped) pentru seturile preprocesate train/validation/test
+import numpy as np
+import json
+import os
+
+from src.neural_network.numpy_engine import file_sha256
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
+CACHE_DIR = os.path.join(DATA_DIR, 'cache')
+MANIFEST_NAME = 'manifest.json'
+CACHE_FORMAT_VERSION = 1
+
+# Numele seturilor și fișierele CSV din care provin (relativ la directorul data/)
+DATASET_SOURCES = {
+    'X_train': os.path.join('train', 'X_train.csv'),
+    'y_train': os.path.join('train', 'y_train.csv'),
+    'X_val': os.path.join('validation', 'X_val.csv'),
+    'y_val': os.path.join('validation', 'y_val.csv'),
+    'X_test': os.path.join('test', 'X_test.csv'),
+    'y_test': os.path.join('test', 'y_test.csv'),
+}
+DATASET_DTYPE = np.float32
+
+
+def source_hashes(data_dir=DATA_DIR):
+    """Hash-ul conținutului fiecărui CSV sursă."""
+    return {name: file_sha256(os.path.join(data_dir, rel_path)) for name, rel_path in DATASET_SOURCES.items()}
+
+
+def write_dataset_cache(arrays, data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+    """Scrie seturile ca fișiere .npy + un manifest cu hash-urile CSV-urilor sursă.
+
+    `arrays` este un dict {nume: array} cu cheile din DATASET_SOURCES.
+    Manifestul este scris ultimul, deci un cache scris pe jumătate nu este considerat valid.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    shapes = {}
+    for name in DATASET_SOURCES:
+        array = np.ascontiguousarray(arrays[name], dtype=DATASET_DTYPE)
+        tmp_path = os.path.join(cache_dir, f'{name}.tmp.npy')
+        np.save(tmp_path, array)
+        os.replace(tmp_path, os.path.join(cache_dir, f'{name}.npy'))
+        shapes[name] = list(array.shape)
+
+    return write_manifest(shapes, data_dir, cache_dir)
+
+
+def write_manifest(shapes, data_dir=DATA_DIR, cache_dir=CACHE_DIR, sources=None):
+    """Scrie manifestul (ultimul pas al scrierii cache-ului), cu hash-urile CSV-urilor sursă.
+
+    `sources` ({nume: sha256}) permite hash-urile unor CSV-uri care nu sunt încă la locul lor final;
+    implicit sunt citite CSV-urile din `data_dir`.
+    """
+    manifest = {
+        'format_version': CACHE_FORMAT_VERSION,
+        'dtype': np.dtype(DATASET_DTYPE).name,
+        'shapes': {name: list(shape) for name, shape in shapes.items()},
+        'sources': sources or source_hashes(data_dir),
+    }
+    with open(os.path.join(cache_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=4)
+    return cache_dir
+
+
+def open_cache_writers(shapes, cache_dir=CACHE_DIR):
+    """Deschide fișierele .npy (temporare) pentru scriere pe bucăți, cu forma cunoscută dinainte.
+
+    Antetul .npy este scris imediat, iar rândurile se adaugă apoi cu `append_cache_rows`, deci seturile
+    întregi nu sunt niciodată în memorie; fișierele devin cache valid doar după `commit_cache_writers`,
+    iar până atunci cache-ul existent rămâne neatins.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    writers = {}
+    for name in DATASET_SOURCES:
+        f = open(os.path.join(cache_dir, f'{name}.tmp.npy'), 'wb')
+        np.lib.format.write_array_header_1_0(f, {
+            'descr': np.lib.format.dtype_to_descr(np.dtype(DATASET_DTYPE)),
+            'fortran_order': False,
+            'shape': tuple(shapes[name]),
+        })
+        writers[name] = f
+    return writers
+
+
+def append_cache_rows(writer, rows):
+    writer.write(np.ascontiguousarray(rows, dtype=DATASET_DTYPE).tobytes())
+
+
+def commit_cache_writers(writers, shapes, data_dir=DATA_DIR, cache_dir=CACHE_DIR, sources=None):
+    """Închide fișierele deschise cu `open_cache_writers`, verifică mărimea lor și le pune în locul cache-ului."""
+    for name in DATASET_SOURCES:
+        writers[name].close()
+        tmp_path = os.path.join(cache_dir, f'{name}.tmp.npy')
+        if np.load(tmp_path, mmap_mode='r').shape != tuple(shapes[name]):
+            raise ValueError(f"Setul {name} din cache nu are forma anunțată {tuple(shapes[name])}.")
+
+    manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    for name in DATASET_SOURCES:
+        os.replace(os.path.join(cache_dir, f'{name}.tmp.npy'), os.path.join(cache_dir, f'{name}.npy'))
+    return write_manifest(shapes, data_dir, cache_dir, sources)
+
+
+def discard_cache_writers(writers, cache_dir=CACHE_DIR):
+    """Abandonează o scriere începută cu `open_cache_writers` (cache-ul existent rămâne valid)."""
+    for name, writer in writers.items():
+        writer.close()
+        tmp_path = os.path.join(cache_dir, f'{name}.tmp.npy')
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def is_cache_valid(data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+    """Cache-ul este valid dacă există manifestul și hash-urile CSV-urilor sursă nu s-au schimbat."""
+    manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return False
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != CACHE_FORMAT_VERSION:
+        return False
+    if not all(os.path.exists(os.path.join(cache_dir, f'{name}.npy')) for name in DATASET_SOURCES):
+        return False
+    # Dacă CSV-urile lipsesc, cache-ul este singura sursă disponibilă
+    if not all(os.path.exists(os.path.join(data_dir, rel_path)) for rel_path in DATASET_SOURCES.values()):
+        return True
+    return manifest.get('sources') == source_hashes(data_dir)
+
+
+def load_dataset_cache(cache_dir=CACHE_DIR, mmap=True):
+    """Încarcă seturile din cache (memory-mapped, fără copiere în memorie)."""
+    mmap_mode = 'r' if mmap else None
+    return {name: np.load(os.path.join(cache_dir, f'{name}.npy'), mmap_mode=mmap_mode) for name in DATASET_SOURCES}
+
+
+def load_csv_datasets(data_dir=DATA_DIR):
+    """Calea lentă: parsarea CSV-urilor text."""
+    return {
+        name: np.loadtxt(os.path.join(data_dir, rel_path), delimiter=",", dtype=DATASET_DTYPE)
+        for name, rel_path in DATASET_SOURCES.items()
+    }
+
+
+def load_datasets(data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+    """Folosește cache-ul binar dacă este valid; altfel citește CSV-urile și reconstruiește cache-ul."""
+    if is_cache_valid(data_dir, cache_dir):
+        return load_dataset_cache(cache_dir)
+
+    print("Cache-ul binar lipsește sau este învechit; citesc fișierele CSV...")
+    arrays = load_csv_datasets(data_dir)
+    try:
+        write_dataset_cache(arrays, data_dir, cache_dir)
+        print(f"Cache-ul binar a fost reconstruit în: {cache_dir}")
+    except OSError as e:
+        print(f"Avertisment: nu am putut scrie cache-ul binar ({e}).")
+    return arrays
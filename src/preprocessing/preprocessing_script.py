@@ -1,151 +1,293 @@
-# Importare librarii utile
-import pandas as pd
+# Pre-procesarea setului brut, pe bucăți (out-of-core): memoria folosită nu depinde de mărimea fișierului de intrare
+import argparse
+import os
+import sys
+import time
 import numpy as np
-import os 
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
-from sklearn.impute import SimpleImputer
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.neural_network.numpy_engine import file_sha256
+from src.preprocessing.dataset_cache import (DATASET_SOURCES, open_cache_writers, append_cache_rows, commit_cache_writers,
+                                             discard_cache_writers)
+from src.preprocessing.transform import FeatureTransform, INPUT_FEATURES, AGE_INDEX, TRANSFORM_PATH
+from src.triage_common import DIAGNOSES
 
 # Definirea căilor și structurii de directoare
 DATA_ROOT = 'data'
-PROCESSED_DIR = os.path.join(DATA_ROOT, 'processed')
-TRAIN_DIR = os.path.join(DATA_ROOT, 'train')
-VALIDATION_DIR = os.path.join(DATA_ROOT, 'validation')
-TEST_DIR = os.path.join(DATA_ROOT, 'test')
 DATA_PATH = os.path.join(DATA_ROOT, 'raw', 'dermatology.data')
+CLEANED_REL_PATH = os.path.join('processed', 'dermatology_12features_cleaned.csv')
+# Ieșirile se scriu întâi ca <cale>.new și înlocuiesc fișierele existente doar dacă pre-procesarea reușește
+STAGING_SUFFIX = '.new'
 
-# ----------------- FUNCTIE DE INIȚIALIZARE DIRECTOARE -----------------
-def create_required_directories():
-    """Creează directoarele necesare daca nu exista, pentru a preveni OSError."""
-    for dir_path in [
-        os.path.join(DATA_ROOT, 'raw'),
-        PROCESSED_DIR, 
-        TRAIN_DIR, 
-        VALIDATION_DIR, 
-        TEST_DIR
-    ]:
-        os.makedirs(dir_path, exist_ok=True)
-    print("Structura de directoare a fost verificată/creată.")
-
-# -------------------------- RULARE LOGICĂ --------------------------
-create_required_directories() # APEL NOU
-
-# 1. Definirea Coloanelor/Antet
-# Setul de date nu are antet, dar in documentatie (dermatology.names)
-# am 34 de atribute + Clasa de Ieșire (a 35-a coloană).
-
-# Vom folosi 35 de nume generice pentru a citi datele
-column_names = [f'A{i}' for i in range(1, 35)] + ['Class'] 
-
-# 2. Încărcarea Datelor
-# Specificăm '?' de la Age unde nu stim varsta ca valoare NaN pentru ca Pandas sa o recunoasca
-try:
-    df = pd.read_csv(DATA_PATH, header=None, names=column_names, na_values='?')
-    print("DataFrame încărcat cu succes.")
-except FileNotFoundError:
-    print(f"Eroare: Fisierul nu a fost găsit la calea specificată ({DATA_PATH}). Asigurați-vă că este în directorul corect.")
-    exit()
-
-# 3. Implementarea Modelului Triage)
-# Folosim doar cele 12 atribute clinice non-invazive(plus Clasa de Ieșire)
-# Bazat pe documentația din dermatology.names:
-# A1-A10 (clinice 0-3), A11 (family history 0/1), A34 (Age - linear)
-input_features_to_keep = [
-    'A1', 'A2', 'A3', 'A4', 'A5', 'A6', 'A7', 'A8', 'A9', 'A10', 'A11', 'A34'
-]
-
-# Clasa de Ieșire pentru selecția finală
-selected_df = df[input_features_to_keep + ['Class']].copy()
-
-# 4. Curățarea Datelor: Tratarea Valorilor Lipsă
-# Valori lipsă sunt doar în coloana 'A34' (Age) [cite: 21]
-# Tratăm '?' (care acum sunt NaN) prin imputare cu mediana, conform README.
-
-# Calcul mediană pe coloana 'Age' (A34)
-median_age = selected_df['A34'].median()
-
-# Înlocuirea dinamică a valorilor lipsă cu mediana (folosind .loc pentru a evita FutureWarning)
-selected_df.loc[:, 'A34'] = selected_df['A34'].fillna(median_age)
-
-# Verific dacă mai sunt valori lipsă
-print("\nVerificare Valori Lipsă după imputare:")
-print(selected_df.isnull().sum())
-print(f"Valoarea medianei folosită pentru imputarea Age: {median_age}")
-
-# 5. Afișarea Datelor Curățate (Sintetic)
-print("\nPrimele 5 rânduri din DataFrame-ul curățat și selectat (12 atribute):")
-print(selected_df.head())
-
-# 6. Stocarea Datelor Curățate
-cleaned_path = os.path.join(PROCESSED_DIR, 'dermatology_12features_cleaned.csv')
-selected_df.to_csv(cleaned_path, index=False)
-print(f"\nDatele curățate au fost salvate în: {cleaned_path}")
-
+# Setul de date nu are antet: 34 de atribute + Clasa de Ieșire (a 35-a coloană), conform dermatology.names
+COLUMN_NAMES = [f'A{i}' for i in range(1, 35)] + ['Class']
+N_CLASSES = len(DIAGNOSES)
+DEFAULT_CHUNK_SIZE = 100_000
 
-# 7. Separare X (Input) si y (Output)
-# X - cele 12 atribute clinice (A1-A11, A34)
-X = selected_df.drop('Class', axis=1)
+# Împărțirea 80% Train, 10% Validation, 10% Test, stratificată: din fiecare 10 cazuri consecutive ale unei
+# clase, 8 ajung în train, 1 în validation și 1 în test (ordinea din bloc este amestecată aleator)
+SPLITS = ('train', 'val', 'test')
+SPLIT_DIRS = {'train': 'train', 'val': 'validation', 'test': 'test'}
+SPLIT_PATTERN = np.array([0] * 8 + [1] + [2])
+# Câte blocuri de split se generează deodată per clasă (independent de mărimea bucăților citite)
+SPLIT_REFILL_BLOCKS = 1024
 
-# y - diagnosticul de la 1 la 6, in functie de ce boala de piele e cea mai probabila
-# Scădem 1 din clasă pentru a o aduce în domeniul 0-5 (necesar pentru One-Hot Encoding/Keras)
-# Deci Clasele vor fi: 0 (psoriazis), 1 (seboreic), 2 (lichen plan), 3 (pityriasis rosea), 4 (cronică eczemă), 5 (pityriasis rubra pilaris)
-y = selected_df['Class'] - 1 
+# Histograma vârstelor pentru mediana aproximativă: coșuri de 1 an pe [0, 256); pentru vârste întregi
+# mediana este exactă, altfel eroarea este sub lățimea unui coș
+AGE_BIN_WIDTH = 1.0
+AGE_BINS = 256
 
-print("\nForma (shape) inițială a datelor:")
-print(f"X: {X.shape}, y: {y.shape}")
 
+# ----------------- FUNCTIE DE INIȚIALIZARE DIRECTOARE -----------------
+def create_required_directories(data_root=DATA_ROOT):
+    """Creează directoarele necesare daca nu exista, pentru a preveni OSError."""
+    for dir_path in [os.path.join(data_root, 'raw'), os.path.join(data_root, 'processed')] + \
+                    [os.path.join(data_root, d) for d in SPLIT_DIRS.values()]:
+        os.makedirs(dir_path, exist_ok=True)
+    print("Structura de directoare a fost verificată/creată.")
 
-# 8. One-Hot Encoding (OHE) al Etichetelor de Ieșire (y)
-# Folosim OneHotEncoder pentru a transforma etichetele (0-5) in vectori binari, 6 coloane (pentru Keras/TensorFlow).
-encoder = OneHotEncoder(sparse_output=False)
-y_encoded = encoder.fit_transform(y.values.reshape(-1, 1))
-
-print(f"Forma y după One-Hot Encoding: {y_encoded.shape}")
-
-
-# 9. Împărțirea Seturilor de Date (Stratified Sampling) ---
-# Implementăm împărțirea 80% Train, 10% Validation, 10% Test cu stratificare (cea din documentul README.md de pe GitHub).
-# Am nevoie de stratificare deoarece am dezechilibru de clase (unele boli sunt mai preponderente in setul meu de date)
-# Pasul A: Split inițial (Train vs. Temp)
-X_train, X_temp, y_train, y_temp = train_test_split(
-    X, y_encoded, test_size=0.2, random_state=42, stratify=y
-)
-
-# Pasul B: Split Temp (Validation vs. Test)
-X_val, X_test, y_val, y_test = train_test_split(
-    X_temp, y_temp, test_size=0.5, random_state=42, stratify=y_temp.argmax(axis=1)
-)
-
-print("\nFormele seturilor după split (aprox. 80/10/10):")
-print(f"Train: {X_train.shape[0]} ({round(X_train.shape[0]/X.shape[0]*100)}%)")
-print(f"Validation: {X_val.shape[0]} ({round(X_val.shape[0]/X.shape[0]*100)}%)")
-print(f"Test: {X_test.shape[0]} ({round(X_test.shape[0]/X.shape[0]*100)}%)")
-
-
-# 10. Normalizarea (Scalarea Min-Max) a Atributelor de Intrare (X) ---
-# Scalarea se face DOAR pe X_train pentru a preveni Data Leakage si implicit incorectitudinea setului de date
-scaler = MinMaxScaler()
-
-# Aplică scalarea (fit_transform) doar pe setul de antrenare
-X_train_scaled = scaler.fit_transform(X_train)
-
-# Aplică scalarea (transform) pe Validation și Test (folosind parametrii învățați din Train)
-X_val_scaled = scaler.transform(X_val)
-X_test_scaled = scaler.transform(X_test)
-
-print("\nDatele sunt acum curățate, scalate și împărțite!")
-
-
-# 11. Salvarea Seturilor Preprocesate
-# Salvăm seturile în folderele dedicate
-
-np.savetxt(os.path.join(TRAIN_DIR, 'X_train.csv'), X_train_scaled, delimiter=",")
-np.savetxt(os.path.join(TRAIN_DIR, 'y_train.csv'), y_train, delimiter=",")
-
-np.savetxt(os.path.join(VALIDATION_DIR, 'X_val.csv'), X_val_scaled, delimiter=",")
-np.savetxt(os.path.join(VALIDATION_DIR, 'y_val.csv'), y_val, delimiter=",")
-
-np.savetxt(os.path.join(TEST_DIR, 'X_test.csv'), X_test_scaled, delimiter=",")
-np.savetxt(os.path.join(TEST_DIR, 'y_test.csv'), y_test, delimiter=",")
 
-print("\nSeturile finale (train/val/test) au fost salvate cu succes.")
\ No newline at end of file
+# -------------------------- ETAPELE PIPELINE-ULUI --------------------------
+def read_raw_chunks(path=DATA_PATH, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Citește fișierul brut pe bucăți de `chunk_size` rânduri; '?' (vârsta necunoscută) devine NaN."""
+    return pd.read_csv(path, header=None, names=COLUMN_NAMES, na_values='?', chunksize=chunk_size)
+
+
+def select_features(chunk):
+    """Cele 12 atribute clinice non-invazive + clasa (0-5).
+
+    Rândurile fără o clasă validă (1-6) sunt eliminate; returnează (X brut (N, 12) cu NaN la vârstele
+    lipsă, y (N,), numărul de rânduri eliminate).
+    """
+    classes = chunk['Class'].to_numpy(dtype=np.float64)
+    valid = np.isin(classes, np.arange(1, N_CLASSES + 1))
+    X = chunk.loc[valid, INPUT_FEATURES].to_numpy(dtype=np.float64)
+    y = classes[valid].astype(np.int64) - 1
+    return X, y, int((~valid).sum())
+
+
+class SplitAssigner:
+    """Atribuie fiecărui rând un split (0 train, 1 val, 2 test) pe măsură ce rândurile sosesc.
+
+    Fiecare clasă are propriul generator (sămânță derivată din `seed`), deci atribuirea depinde doar de
+    ordinea rândurilor din fișier, nu și de mărimea bucăților; două treceri prin fișier dau același rezultat.
+    """
+
+    def __init__(self, seed=42, n_classes=N_CLASSES):
+        self.rngs = [np.random.default_rng([seed, c]) for c in range(n_classes)]
+        self.pending = [np.empty(0, dtype=np.int64) for _ in range(n_classes)]
+
+    def assign(self, y):
+        splits = np.empty(len(y), dtype=np.int64)
+        for c in np.unique(y):
+            rows = np.flatnonzero(y == c)
+            while len(self.pending[c]) < len(rows):
+                blocks = np.tile(SPLIT_PATTERN, (SPLIT_REFILL_BLOCKS, 1))
+                self.pending[c] = np.concatenate([self.pending[c], self.rngs[c].permuted(blocks, axis=1).ravel()])
+            splits[rows] = self.pending[c][:len(rows)]
+            self.pending[c] = self.pending[c][len(rows):]
+        return splits
+
+
+class StreamingStats:
+    """Statisticile necesare transformării, actualizate pe bucăți, cu memorie constantă.
+
+    - mediana vârstei (pe toate rândurile, ca imputarea): din histograma vârstelor
+    - min/max pe atribut: doar pe rândurile din train, pentru a preveni Data Leakage
+    """
+
+    def __init__(self, n_features=len(INPUT_FEATURES)):
+        self.age_counts = np.zeros(AGE_BINS, dtype=np.int64)
+        self.data_min = np.full(n_features, np.inf)
+        self.data_max = np.full(n_features, -np.inf)
+        self.missing_age = 0
+        self.split_counts = np.zeros(len(SPLITS), dtype=np.int64)
+        self.class_counts = np.zeros((len(SPLITS), N_CLASSES), dtype=np.int64)
+
+    def update(self, X, y, splits):
+        age = X[:, AGE_INDEX]
+        known = ~np.isnan(age)
+        self.missing_age += int((~known).sum())
+        bins = np.clip((age[known] // AGE_BIN_WIDTH).astype(np.int64), 0, AGE_BINS - 1)
+        self.age_counts += np.bincount(bins, minlength=AGE_BINS)
+
+        # Vârstele lipsă din train primesc mediana, care este oricum în interval, deci nu schimbă min/max
+        train = X[splits == 0]
+        if len(train):
+            self.data_min = np.fmin(self.data_min, np.nanmin(train, axis=0))
+            self.data_max = np.fmax(self.data_max, np.nanmax(train, axis=0))
+        self.split_counts += np.bincount(splits, minlength=len(SPLITS))
+        np.add.at(self.class_counts, (splits, y), 1)
+
+    def median_age(self):
+        """Mediana din histogramă: media celor două valori din mijloc (ca pandas), la nivel de coș."""
+        n = int(self.age_counts.sum())
+        if n == 0:
+            return float('nan')
+        cumulative = np.cumsum(self.age_counts)
+        middle = np.searchsorted(cumulative, [(n - 1) // 2 + 1, n // 2 + 1])
+        return float(middle.mean() * AGE_BIN_WIDTH)
+
+    def to_transform(self):
+        return FeatureTransform(self.data_min, self.data_max, self.median_age(), int(self.split_counts[0]))
+
+
+def collect_statistics(path=DATA_PATH, chunk_size=DEFAULT_CHUNK_SIZE, seed=42):
+    """Prima trecere: atribuirea split-urilor și statisticile (mediana vârstei, min/max pe train, numărători)."""
+    stats = StreamingStats()
+    assigner = SplitAssigner(seed)
+    n_dropped = 0
+    for chunk in read_raw_chunks(path, chunk_size):
+        X, y, dropped = select_features(chunk)
+        n_dropped += dropped
+        stats.update(X, y, assigner.assign(y))
+    return stats, n_dropped
+
+
+def output_paths(data_root=DATA_ROOT):
+    """Căile finale ale ieșirilor: setul curățat și CSV-urile X/y per split."""
+    paths = {'cleaned': os.path.join(data_root, CLEANED_REL_PATH)}
+    paths.update({name: os.path.join(data_root, rel_path) for name, rel_path in DATASET_SOURCES.items()})
+    return paths
+
+
+def open_outputs(data_root=DATA_ROOT):
+    """Fișierele de ieșire deschise pentru scriere incrementală, ca fișiere temporare lângă cele finale.
+
+    Returnează (căile finale, fișierele temporare deschise); ieșirile existente rămân neatinse până la final.
+    """
+    paths = output_paths(data_root)
+    files = {key: open(path + STAGING_SUFFIX, 'w') for key, path in paths.items()}
+    files['cleaned'].write(",".join(INPUT_FEATURES + ['Class']) + "\n")
+    return paths, files
+
+
+def remove_staged(paths):
+    for path in paths:
+        if os.path.exists(path + STAGING_SUFFIX):
+            os.remove(path + STAGING_SUFFIX)
+
+
+def write_chunk(X_scaled, y, splits, X_imputed, files, cache_writers):
+    """Adaugă o bucată transformată la toate ieșirile (setul curățat, CSV-urile și cache-ul .npy)."""
+    # Setul curățat: atributele brute cu vârsta imputată, clasa în domeniul original 1-6
+    cleaned_df = pd.DataFrame(X_imputed, columns=INPUT_FEATURES).astype({f: np.int64 for f in INPUT_FEATURES if f != 'A34'})
+    cleaned_df['Class'] = y + 1
+    cleaned_df.to_csv(files['cleaned'], header=False, index=False)
+
+    y_encoded = np.eye(N_CLASSES)[y]
+    for split_id, split in enumerate(SPLITS):
+        rows = splits == split_id
+        for prefix, data in (('X', X_scaled[rows]), ('y', y_encoded[rows])):
+            name = f'{prefix}_{split}'
+            np.savetxt(files[name], data, delimiter=",")
+            append_cache_rows(cache_writers[name], data)
+
+
+def write_outputs(feature_transform, stats, path=DATA_PATH, data_root=DATA_ROOT, chunk_size=DEFAULT_CHUNK_SIZE, seed=42):
+    """A doua trecere: imputare + scalare pe bucăți și scriere incrementală (CSV-uri + cache .npy).
+
+    Totul se scrie în fișiere temporare; CSV-urile finale sunt înlocuite (os.replace) doar după ce cache-ul
+    a fost finalizat, iar la o eroare ieșirile anterioare rămân neschimbate.
+    """
+    shapes = {}
+    for split_id, split in enumerate(SPLITS):
+        shapes[f'X_{split}'] = (int(stats.split_counts[split_id]), len(INPUT_FEATURES))
+        shapes[f'y_{split}'] = (int(stats.split_counts[split_id]), N_CLASSES)
+    cache_dir = os.path.join(data_root, 'cache')
+    cache_writers = open_cache_writers(shapes, cache_dir)
+
+    assigner = SplitAssigner(seed)
+    paths, files = open_outputs(data_root)
+    try:
+        for chunk in read_raw_chunks(path, chunk_size):
+            X, y, _ = select_features(chunk)
+            splits = assigner.assign(y)
+            X_imputed = X.copy()
+            X_imputed[np.isnan(X_imputed[:, AGE_INDEX]), AGE_INDEX] = feature_transform.median_age
+            X_scaled = feature_transform.transform(X, dtype=np.float64)
+            write_chunk(X_scaled, y, splits, X_imputed, files, cache_writers)
+        for f in files.values():
+            f.close()
+
+        # Manifestul păstrează hash-ul CSV-urilor noi, ca un cache învechit să fie reconstruit automat
+        sources = {name: file_sha256(paths[name] + STAGING_SUFFIX) for name in DATASET_SOURCES}
+        commit_cache_writers(cache_writers, shapes, data_root, cache_dir, sources)
+    except BaseException:
+        for f in files.values():
+            f.close()
+        discard_cache_writers(cache_writers, cache_dir)
+        remove_staged(paths.values())
+        raise
+
+    for final_path in paths.values():
+        os.replace(final_path + STAGING_SUFFIX, final_path)
+    return cache_dir
+
+
+def run_pipeline(path=DATA_PATH, data_root=DATA_ROOT, transform_path=TRANSFORM_PATH, chunk_size=DEFAULT_CHUNK_SIZE, seed=42):
+    """Pre-procesarea completă în două treceri prin fișierul brut; returnează (transformarea, statisticile).
+
+    Transformarea folosită de GUI și de scorarea în lot este înlocuită abia după ce toate seturile au fost
+    scrise, deci o eroare în a doua trecere nu lasă un scaler nou lângă seturi vechi (sau invers).
+    """
+    create_required_directories(data_root)
+
+    stats, n_dropped = collect_statistics(path, chunk_size, seed)
+    if stats.split_counts[0] == 0:
+        raise ValueError(f"Fișierul {path} nu conține niciun rând valid.")
+    if n_dropped:
+        print(f"Avertisment: {n_dropped} rânduri fără o clasă validă (1-{N_CLASSES}) au fost ignorate.")
+
+    # Salvăm parametrii (min/max + mediana vârstei) lângă model, pentru ca GUI-ul și scorarea în lot
+    # să folosească exact aceeași transformare ca la antrenare
+    feature_transform = stats.to_transform()
+    feature_transform.save(transform_path + STAGING_SUFFIX)
+    print(f"Valoarea medianei folosită pentru imputarea Age: {feature_transform.median_age} "
+          f"({stats.missing_age} vârste lipsă)")
+
+    try:
+        cache_dir = write_outputs(feature_transform, stats, path, data_root, chunk_size, seed)
+    except BaseException:
+        remove_staged([transform_path])
+        raise
+    os.replace(transform_path + STAGING_SUFFIX, transform_path)
+    print(f"Parametrii transformării au fost salvați în: {transform_path}")
+    print(f"Seturile finale (train/val/test) au fost salvate în {data_root}; cache-ul binar în: {cache_dir}")
+    return feature_transform, stats
+
+
+def print_split_summary(stats):
+    total = stats.split_counts.sum()
+    print("\nFormele seturilor după split (aprox. 80/10/10, stratificat):")
+    for split_id, split in enumerate(SPLITS):
+        n = stats.split_counts[split_id]
+        per_class = ", ".join(str(n_class) for n_class in stats.class_counts[split_id])
+        print(f"{split}: {n} ({round(n / total * 100)}%) | per clasă: {per_class}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-procesarea setului brut pe bucăți (imputare, split stratificat, scalare).")
+    parser.add_argument('--input', default=DATA_PATH, help="Fișierul brut (format dermatology.data)")
+    parser.add_argument('--data-root', default=DATA_ROOT, help="Directorul în care se scriu seturile și cache-ul")
+    parser.add_argument('--transform', default=TRANSFORM_PATH, help="Unde se salvează parametrii transformării")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rânduri citite din fișierul brut odată")
+    parser.add_argument('--seed', type=int, default=42, help="Sămânța pentru atribuirea split-urilor")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Eroare: Fisierul nu a fost găsit la calea specificată ({args.input}). Asigurați-vă că este în directorul corect.")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    _, stats = run_pipeline(args.input, args.data_root, args.transform, args.chunk_size, args.seed)
+    print_split_summary(stats)
+    elapsed = time.perf_counter() - start
+    try:
+        # Modulul `resource` există doar pe Unix; ru_maxrss este în KB pe Linux
+        import resource
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"\nPre-procesare finalizată în {elapsed:.2f} s (memorie maximă: {peak_mb:.0f} MB).")
+    except ImportError:
+        print(f"\nPre-procesare finalizată în {elapsed:.2f} s.")
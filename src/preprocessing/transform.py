@@ -0,0 +1,94 @@
+# Transformarea atributelor brute -> intrarea modelului, comună pentru antrenare, GUI și scorarea în lot
+import numpy as np
+import json
+import os
+
+# Artefactul cu parametrii scalerului se salvează lângă model
+TRANSFORM_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'neural_network', 'dermotriage_scaler.json'))
+TRANSFORM_FORMAT_VERSION = 1
+
+# Cele 12 atribute clinice non-invazive, în ordinea de intrare a modelului
+# A1-A10 (clinice 0-3), A11 (family history 0/1), A34 (Age)
+INPUT_FEATURES = ['A1', 'A2', 'A3', 'A4', 'A5', 'A6', 'A7', 'A8', 'A9', 'A10', 'A11', 'A34']
+AGE_INDEX = INPUT_FEATURES.index('A34')
+
+
+class FeatureTransform:
+    """Imputare (mediana vârstei) + scalare Min-Max, cu parametrii învățați pe X_train."""
+
+    def __init__(self, data_min, data_max, median_age, n_samples=None):
+        self.data_min = np.asarray(data_min, dtype=np.float64)
+        self.data_max = np.asarray(data_max, dtype=np.float64)
+        self.median_age = float(median_age)
+        self.n_samples = n_samples
+
+        # Aceleași formule ca MinMaxScaler: X * scale_ + min_ (coloanele constante au scale_ = 1)
+        data_range = self.data_max - self.data_min
+        data_range[data_range == 0.0] = 1.0
+        self.scale_ = 1.0 / data_range
+        self.min_ = -self.data_min * self.scale_
+
+    @classmethod
+    def fit(cls, raw_X):
+        """Învață parametrii direct dintr-o matrice brută (N, 12); NaN-urile sunt ignorate."""
+        raw_X = np.asarray(raw_X, dtype=np.float64)
+        return cls(np.nanmin(raw_X, axis=0), np.nanmax(raw_X, axis=0), np.nanmedian(raw_X[:, AGE_INDEX]), len(raw_X))
+
+    @classmethod
+    def from_scaler(cls, scaler, median_age):
+        """Construiește transformarea dintr-un MinMaxScaler deja antrenat (sklearn)."""
+        return cls(scaler.data_min_, scaler.data_max_, median_age, int(scaler.n_samples_seen_))
+
+    def transform(self, raw_batch, dtype=np.float32):
+        """Transformă vectorizat un batch (N, 12) de atribute brute; vârstele lipsă (NaN) primesc mediana."""
+        X = np.array(raw_batch, dtype=np.float64).reshape(-1, len(INPUT_FEATURES))
+        age = X[:, AGE_INDEX]
+        age[np.isnan(age)] = self.median_age
+        X *= self.scale_
+        X += self.min_
+        return X.astype(dtype, copy=False)
+
+    def to_dict(self):
+        return {
+            'format_version': TRANSFORM_FORMAT_VERSION,
+            'features': INPUT_FEATURES,
+            'data_min': self.data_min.tolist(),
+            'data_max': self.data_max.tolist(),
+            'median_age': self.median_age,
+            'n_samples': self.n_samples,
+        }
+
+    def save(self, path=TRANSFORM_PATH):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=4)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path=TRANSFORM_PATH):
+        with open(path, 'r') as f:
+            params = json.load(f)
+        if params.get('format_version') != TRANSFORM_FORMAT_VERSION:
+            raise ValueError(f"Versiune necunoscută a artefactului de scalare: {params.get('format_version')}")
+        if params['features'] != INPUT_FEATURES:
+            raise ValueError(f"Atributele din artefact nu corespund modelului: {params['features']}")
+        return cls(params['data_min'], params['data_max'], params['median_age'], params.get('n_samples'))
+
+
+_default_transforms = {}
+
+
+def load_transform(path=TRANSFORM_PATH):
+    """Transformarea salvată (păstrată în memorie după prima încărcare; reîncărcată dacă fișierul se schimbă)."""
+    mtime = os.path.getmtime(path)
+    cached = _default_transforms.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, FeatureTransform.load(path))
+        _default_transforms[path] = cached
+    return cached[1]
+
+
+def transform(raw_batch, path=TRANSFORM_PATH, dtype=np.float32):
+    """Funcția unică de transformare: atribute brute (N, 12) -> intrarea modelului (N, 12)."""
+    return load_transform(path).transform(raw_batch, dtype)
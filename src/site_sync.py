@@ -0,0 +1,235 @@
+# Sincronizare incrementală a cazurilor din bazele de date ale mai multor clinici într-o bază centrală
+import argparse
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src import database_manager
+from src.database_manager import ALERT_THRESHOLD, encode_symptoms
+
+DEFAULT_CHUNK_SIZE = 10_000
+DEFAULT_READERS = 4
+# Numărul maxim de bucăți citite care așteaptă să fie scrise (limitează memoria când scrierea e mai lentă)
+MAX_PENDING_CHUNKS = 8
+
+# Schema suplimentară a bazei centrale: proveniența fiecărui caz și watermark-ul fiecărei clinici
+CENTRAL_COLUMNS = (("site_id", "TEXT"), ("site_case_id", "INTEGER"))
+CREATE_SITE_CASE_INDEX_SQL = "CREATE UNIQUE INDEX IF NOT EXISTS idx_cases_site ON cases (site_id, site_case_id)"
+CREATE_SYNC_STATE_SQL = '''
+    CREATE TABLE IF NOT EXISTS sync_state (
+        site_id TEXT PRIMARY KEY,
+        db_path TEXT NOT NULL,
+        last_id INTEGER NOT NULL,
+        synced_at TEXT NOT NULL
+    )
+'''
+SITE_WATERMARKS_SQL = "SELECT site_id, last_id FROM sync_state"
+# Cazurile deja sincronizate (site_id, site_case_id) sunt ignorate, deci o rulare repetată nu dublează nimic
+INSERT_SITE_CASE_SQL = '''
+    INSERT OR IGNORE INTO cases (diagnosis_class, prediction_date, symptoms_vector, quiz_responses, prediction_ts,
+                                 site_id, site_case_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+UPSERT_SYNC_STATE_SQL = '''
+    INSERT INTO sync_state (site_id, db_path, last_id, synced_at) VALUES (?, ?, ?, ?)
+    ON CONFLICT (site_id) DO UPDATE SET db_path = excluded.db_path, last_id = MAX(last_id, excluded.last_id),
+                                        synced_at = excluded.synced_at
+'''
+WINDOW_CLASS_BY_SITE_SQL = '''
+    SELECT diagnosis_class, COALESCE(site_id, 'central'), COUNT(*)
+    FROM cases
+    WHERE prediction_ts >= ?
+    GROUP BY 1, 2
+'''
+
+
+def parse_site(spec):
+    """'nume=cale' sau doar 'cale' (numele clinicii este atunci numele fișierului, fără extensie)."""
+    name, sep, path = spec.partition('=')
+    if not sep:
+        path, name = spec, os.path.splitext(os.path.basename(spec))[0]
+    return name, os.path.abspath(path)
+
+
+def parse_sites(specs):
+    """{site_id: cale} din specificațiile din linia de comandă; un site_id repetat este o eroare.
+
+    Bazele clinicilor au de obicei același nume de fișier (undermyaiskin_cases.db), deci fără 'nume=' toate
+    ar primi același site_id și ar împărți același watermark.
+    """
+    sites = {}
+    for spec in specs:
+        site_id, path = parse_site(spec)
+        if site_id in sites:
+            raise ValueError(f"Clinica '{site_id}' apare de mai multe ori ({sites[site_id]} și {path}); "
+                             f"dați un nume unic fiecărei baze, ca 'nume=cale'.")
+        sites[site_id] = path
+    return sites
+
+
+def initialize_central(central_path):
+    """Baza centrală are schema obișnuită (database_manager) plus proveniența cazurilor și tabelul de watermark-uri."""
+    database_manager.configure_database(central_path)
+    database_manager.initialize_database()
+    with database_manager.get_connection() as conn, conn:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(cases)")]
+        for name, sql_type in CENTRAL_COLUMNS:
+            if name not in columns:
+                conn.execute(f"ALTER TABLE cases ADD COLUMN {name} {sql_type}")
+        conn.execute(CREATE_SITE_CASE_INDEX_SQL)
+        conn.execute(CREATE_SYNC_STATE_SQL)
+        return dict(conn.execute(SITE_WATERMARKS_SQL).fetchall())
+
+
+def site_select_sql(conn):
+    """Interogarea pe bucăți pentru o bază de clinică (bazele vechi nu au coloana prediction_ts)."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(cases)")]
+    ts_column = 'prediction_ts' if 'prediction_ts' in columns else 'NULL'
+    return f'''
+        SELECT id, diagnosis_class, prediction_date, symptoms_vector, quiz_responses, {ts_column}
+        FROM cases
+        WHERE id > ?
+        ORDER BY id
+        LIMIT ?
+    '''
+
+
+def read_site(site_id, db_path, after_id, chunk_size, out_queue):
+    """Citește cazurile cu id > after_id dintr-o bază de clinică (doar citire) și le pune în coadă pe bucăți."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        sql = site_select_sql(conn)
+        last_id = after_id
+        while True:
+            rows = conn.execute(sql, (last_id, chunk_size)).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            out_queue.put((site_id, db_path, rows))
+    finally:
+        conn.close()
+
+
+def to_central_rows(site_id, rows):
+    """Rândurile unei clinici în formatul bazei centrale (vectori compacți, prediction_ts completat)."""
+    converted = []
+    for case_id, diagnosis_class, prediction_date, symptoms, quiz, prediction_ts in rows:
+        if prediction_ts is None:
+            prediction_ts = int(datetime.strptime(prediction_date, '%Y-%m-%d %H:%M:%S').timestamp())
+        converted.append((diagnosis_class, prediction_date, encode_symptoms(symptoms),
+                          database_manager.encode_quiz_responses(quiz), prediction_ts, site_id, case_id))
+    return converted
+
+
+def write_chunk(conn, site_id, db_path, rows):
+    """Scrie o bucată și avansează watermark-ul clinicii în aceeași tranzacție; returnează rândurile noi."""
+    central_rows = to_central_rows(site_id, rows)
+    daily = {}
+    for row in central_rows:
+        key = (row[1][:10], row[0])
+        daily[key] = daily.get(key, 0) + 1
+
+    with conn:
+        before = conn.total_changes
+        conn.executemany(INSERT_SITE_CASE_SQL, central_rows)
+        inserted = conn.total_changes - before
+        # Agregatul zilnic se actualizează doar dacă toate rândurile sunt noi (cazul obișnuit);
+        # altfel este recalculat la final
+        if inserted == len(central_rows):
+            conn.executemany(database_manager.UPSERT_DAILY_COUNT_SQL, [(d, c, n) for (d, c), n in daily.items()])
+        conn.execute(UPSERT_SYNC_STATE_SQL, (site_id, db_path, rows[-1][0], datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+    return inserted, inserted == len(central_rows)
+
+
+def sync_sites(sites, central_path, chunk_size=DEFAULT_CHUNK_SIZE, readers=DEFAULT_READERS):
+    """Sincronizează clinicile `sites` ({site_id: cale}) în baza centrală; returnează {site_id: rânduri noi}.
+
+    Cititorii (câte un fir per clinică, cel mult `readers` simultan) citesc în paralel, iar un singur
+    scriitor aplică bucățile în baza centrală, fiecare într-o tranzacție împreună cu watermark-ul.
+    """
+    watermarks = initialize_central(central_path)
+    chunks = queue.Queue(maxsize=MAX_PENDING_CHUNKS)
+    pending_sites = list(sites.items())
+    errors = {}
+    lock = threading.Lock()
+
+    def reader_loop():
+        while True:
+            with lock:
+                if not pending_sites:
+                    return
+                site_id, db_path = pending_sites.pop(0)
+            try:
+                read_site(site_id, db_path, watermarks.get(site_id, 0), chunk_size, chunks)
+            except sqlite3.Error as e:
+                errors[site_id] = str(e)
+
+    threads = [threading.Thread(target=reader_loop, daemon=True) for _ in range(min(readers, len(sites)))]
+    for thread in threads:
+        thread.start()
+
+    inserted = {site_id: 0 for site_id in sites}
+    rollup_complete = True
+    with database_manager.get_connection() as conn:
+        while any(thread.is_alive() for thread in threads) or not chunks.empty():
+            try:
+                site_id, db_path, rows = chunks.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            n_new, complete = write_chunk(conn, site_id, db_path, rows)
+            inserted[site_id] += n_new
+            rollup_complete &= complete
+
+    if not rollup_complete:
+        database_manager.rebuild_daily_counts()
+    for site_id, message in errors.items():
+        print(f"EROARE la citirea clinicii {site_id}: {message}")
+    return inserted
+
+
+def combined_alerts():
+    """Alerta epidemică pe datele combinate + contribuția fiecărei clinici la clasele în alertă."""
+    database_manager.initialize_database()
+    focare = database_manager.check_for_epidemic_alert()
+    with database_manager.get_connection() as conn:
+        rows = conn.execute(WINDOW_CLASS_BY_SITE_SQL, (database_manager.alert_window_start(),)).fetchall()
+    by_site = {}
+    for diagnosis_class, site_id, n in rows:
+        if diagnosis_class in focare:
+            by_site.setdefault(diagnosis_class, {})[site_id] = n
+    return focare, by_site
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sincronizează bazele de date ale clinicilor într-o bază centrală.")
+    parser.add_argument('central', help="Baza de date centrală (creată dacă nu există)")
+    parser.add_argument('sites', nargs='+', help="Bazele clinicilor, ca 'nume=cale' sau 'cale'")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rânduri citite și scrise per tranzacție")
+    parser.add_argument('--readers', type=int, default=DEFAULT_READERS, help="Numărul de clinici citite în paralel")
+    args = parser.parse_args()
+
+    try:
+        sites = parse_sites(args.sites)
+    except ValueError as e:
+        parser.error(str(e))
+    start = time.perf_counter()
+    inserted = sync_sites(sites, args.central, args.chunk_size, args.readers)
+    elapsed = time.perf_counter() - start
+    for site_id, n in sorted(inserted.items()):
+        print(f"  {site_id}: {n} cazuri noi")
+    total = sum(inserted.values())
+    print(f"Sincronizare finalizată: {total} cazuri noi din {len(sites)} clinici în {elapsed:.2f} s "
+          f"({total / max(elapsed, 1e-9):,.0f} cazuri/s)")
+
+    # Alertele rulează pe datele tuturor clinicilor, cu același prag ca local
+    focare, by_site = combined_alerts()
+    if not focare:
+        print(f"Nu sunt focare active în datele combinate (prag: {ALERT_THRESHOLD} cazuri).")
+    for diagnosis_class in focare:
+        contributions = ", ".join(f"{site}: {n}" for site, n in sorted(by_site.get(diagnosis_class, {}).items()))
+        print(f"  Clasa {diagnosis_class}: {contributions}")
@@ -0,0 +1,29 @@
+import os
+
+# Cele 12 atribute clinice, în ordinea de intrare a modelului (definite lângă transformarea comună)
+from src.preprocessing.transform import INPUT_FEATURES
+
+# Constante comune pentru aplicația GUI și pentru căile de inferență fără interfață
+# (acest modul nu importă PyQt, pentru a putea fi folosit din scripturi/CLI)
+
+# --- Configuratii ---
+MODEL_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), 'neural_network', 'dermotriage_mlp_model.h5'))
+# Vom folosi numele bolilor de la clasa 1 la 6
+DIAGNOSES = {
+    1: "Psoriazis",
+    2: "Dermatită seboreică",
+    3: "Lichen plan",
+    4: "Pityriasis rosea",
+    5: "Dermatită cronică",
+    6: "Pityriasis rubra pilaris"
+}
+
+# --- Recomandări Clinice (Text) ---
+RECOMMENDATIONS = {
+    1: "Necesită neapărat vizita la dermatolog. Această afecțiune necesită o schemă de tratament complexă.",
+    2: "Este nevoie de medicamente topice. Consultați medicul de familie pentru un tratament inițial.",
+    3: "Necesită neapărat vizita la dermatolog pentru confirmare și tratament sistemic.",
+    4: "Trece de la sine în 6-8 săptămâni. Monitorizați simptomele; consultați un medic doar dacă se agravează.",
+    5: "Este nevoie de medicamente. Evitați factorii iritanți și consultați un medic pentru prescripții de unguente.",
+    6: "Necesită neapărat vizita la dermatolog. Terapia este adesea complexă și de lungă durată."
+}
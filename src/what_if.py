@@ -0,0 +1,103 @@
+# Analiză what-if (sensibilitate) pentru un singur pacient: toate variantele cu un singur atribut schimbat,
+# scorate într-un singur forward pass
+import numpy as np
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.triage_common import DIAGNOSES, INPUT_FEATURES
+from src.preprocessing.transform import AGE_INDEX
+
+# Valorile încercate pentru fiecare atribut: A1-A10 nivel 0-3, A11 0/1, vârsta din 5 în 5 ani
+SYMPTOM_LEVELS = (0, 1, 2, 3)
+FAMILY_HISTORY_LEVELS = (0, 1)
+AGE_VALUES = tuple(range(5, 91, 5))
+FAMILY_HISTORY_INDEX = INPUT_FEATURES.index('A11')
+
+
+def attribute_levels(index):
+    if index == AGE_INDEX:
+        return AGE_VALUES
+    if index == FAMILY_HISTORY_INDEX:
+        return FAMILY_HISTORY_LEVELS
+    return SYMPTOM_LEVELS
+
+
+def generate_variants(raw_vector):
+    """Vectorul de bază (rândul 0) urmat de toate variantele care diferă printr-un singur atribut.
+
+    Returnează (variante (M, 12), indicele atributului schimbat (M,), valoarea nouă (M,));
+    pentru rândul de bază indicele este -1.
+    """
+    base = np.asarray(raw_vector, dtype=np.float64).reshape(len(INPUT_FEATURES))
+    attributes, values = [-1], [np.nan]
+    for index in range(len(base)):
+        for value in attribute_levels(index):
+            if value != base[index]:
+                attributes.append(index)
+                values.append(value)
+
+    attributes = np.array(attributes)
+    values = np.array(values, dtype=np.float64)
+    variants = np.tile(base, (len(attributes), 1))
+    rows = np.arange(1, len(attributes))
+    variants[rows, attributes[1:]] = values[1:]
+    return variants, attributes, values
+
+
+def sensitivity(predict_raw, raw_vector):
+    """Scorează toate variantele printr-un singur apel `predict_raw` și clasifică atributele după impact.
+
+    Impactul unui atribut = cea mai mare schimbare (în valoare absolută) a probabilității clasei top-1
+    a pacientului, peste toate valorile încercate. Returnează dicționarul cu clasa de bază și lista
+    atributelor sortată descrescător după impact.
+    """
+    variants, attributes, values = generate_variants(raw_vector)
+    probabilities = np.asarray(predict_raw(variants))
+
+    base_probs = probabilities[0]
+    base_class = int(base_probs.argmax())
+    top1_delta = probabilities[1:, base_class] - base_probs[base_class]
+    top1_class = probabilities[1:].argmax(axis=1)
+    attributes, values = attributes[1:], values[1:]
+
+    ranking = []
+    for index in np.unique(attributes):
+        rows = np.flatnonzero(attributes == index)
+        strongest = rows[np.abs(top1_delta[rows]).argmax()]
+        flips = rows[top1_class[rows] != base_class]
+        ranking.append({
+            'attribute': int(index),
+            'current_value': float(variants[0, index]),
+            'impact': float(abs(top1_delta[strongest])),
+            'strongest_value': float(values[strongest]),
+            'strongest_delta': float(top1_delta[strongest]),
+            # Valorile care schimbă diagnosticul top-1 și noua clasă (1-6)
+            'flips': [(float(values[r]), int(top1_class[r]) + 1) for r in flips],
+        })
+    ranking.sort(key=lambda item: item['impact'], reverse=True)
+
+    return {
+        'base_class': base_class + 1,
+        'base_probability': float(base_probs[base_class]),
+        'n_variants': len(variants),
+        'ranking': ranking,
+    }
+
+
+def format_sensitivity(report, attribute_names, top_n=None):
+    """Text pentru interfață: atributele care mișcă cel mai mult diagnosticul top-1."""
+    lines = [
+        f"Diagnostic de bază: {DIAGNOSES[report['base_class']]} ({report['base_probability'] * 100:.2f}%)",
+        f"{report['n_variants'] - 1} variante evaluate într-un singur pas.",
+        "",
+        "Impact | Atribut (valoarea actuală -> valoarea cu efect maxim)",
+        "---------------------------------",
+    ]
+    for item in report['ranking'][:top_n]:
+        current, strongest = int(item['current_value']), int(item['strongest_value'])
+        lines.append(f"{item['strongest_delta'] * 100:+6.1f} pp | {attribute_names[item['attribute']]} ({current} -> {strongest})")
+        if item['flips']:
+            changes = ", ".join(f"{int(v)}: {DIAGNOSES[c]}" for v, c in item['flips'])
+            lines.append(f"            ⚠ schimbă diagnosticul top-1 -> {changes}")
+    return "\n".join(lines)